@@ -4,6 +4,8 @@
 Kvirt config class
 """
 
+from collections import OrderedDict
+from copy import deepcopy
 from distutils.spawn import find_executable
 from getpass import getuser
 from kvirt.defaults import (NETS, POOL, CPUMODEL, NUMCPUS, MEMORY, DISKS,
@@ -17,8 +19,9 @@ from kvirt.defaults import (NETS, POOL, CPUMODEL, NUMCPUS, MEMORY, DISKS,
                             NOTIFYSCRIPT, SLACKTOKEN, NOTIFYCMD, NOTIFYMETHODS, SLACKCHANNEL, SHAREDFOLDERS, KERNEL,
                             INITRD, CMDLINE, PLACEMENT, YAMLINVENTORY, CPUHOTPLUG, MEMORYHOTPLUG, CPUFLAGS, CPUPINNING,
                             NUMAMODE, NUMA, PCIDEVICES, VIRTTYPE, MAILSERVER, MAILFROM, MAILTO, TPM, JENKINSMODE, RNG,
-                            ZEROTIER_NETS, ZEROTIER_KUBELET, VMPORT, VMUSER, VMRULES, CACHE, SECURITYGROUPS,
-                            LOCAL_OPENSHIFT_APPS)
+                            ZEROTIER_NETS, ZEROTIER_KUBELET, VMPORT, VMUSER, VMRULES, CACHE, CACHETTL, SECURITYGROUPS,
+                            LOCAL_OPENSHIFT_APPS, THREADED, MAXTHREADS, WAITTIMEOUT, IMAGECACHE,
+                            IMAGECACHESIZE)
 from random import choice
 from kvirt import common
 from kvirt.common import error, pprint, warning
@@ -26,16 +29,52 @@ from kvirt.jinjafilters import jinjafilters
 from kvirt import k3s
 from kvirt import kubeadm
 from kvirt import openshift
+import json
 import os
 from shutil import copytree, rmtree
 import yaml
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, meta, nodes
 from jinja2 import StrictUndefined as strictundefined
 from jinja2.runtime import Undefined as defaultundefined
 from jinja2.exceptions import TemplateSyntaxError, TemplateError
 import re
 import sys
 
+RENDERS = 16
+# filters whose output depends on live state rather than on the files and overrides of a render
+VOLATILEFILTERS = ['kcli_info', 'local_ip', 'waitcrd', 'github_version']
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _template_dependencies(env, name, dependencies, seen=None):
+    """
+    Record mtimes of the templates statically included or imported by template name,
+    returning whether any of them uses a volatile filter
+    """
+    seen = set() if seen is None else seen
+    if name in seen:
+        return False
+    seen.add(name)
+    path = os.path.join(env.loader.searchpath[0], name)
+    dependencies.setdefault(path, _mtime(path))
+    try:
+        source = env.loader.get_source(env, name)[0]
+        parsed = env.parse(source)
+        references = meta.find_referenced_templates(parsed)
+    except (TemplateError, OSError):
+        return False
+    volatile = any(node.name in VOLATILEFILTERS for node in parsed.find_all(nodes.Filter))
+    for reference in references:
+        if reference is not None and _template_dependencies(env, reference, dependencies, seen):
+            volatile = True
+    return volatile
+
 
 class Kbaseconfig:
     """
@@ -190,7 +229,13 @@ class Kbaseconfig:
         defaults['vmport'] = default.get('vmport', VMPORT)
         defaults['vmrules'] = default.get('vmrules', VMRULES)
         defaults['cache'] = default.get('cache', CACHE)
+        defaults['cachettl'] = default.get('cachettl', CACHETTL)
+        defaults['threaded'] = default.get('threaded', THREADED)
+        defaults['maxthreads'] = default.get('maxthreads', MAXTHREADS)
+        defaults['waittimeout'] = default.get('waittimeout', WAITTIMEOUT)
         defaults['securitygroups'] = default.get('securitygroups', SECURITYGROUPS)
+        defaults['imagecache'] = default.get('imagecache', IMAGECACHE)
+        defaults['imagecachesize'] = default.get('imagecachesize', IMAGECACHESIZE)
         currentplanfile = "%s/.kcli/plan" % os.environ.get('HOME')
         if os.path.exists(currentplanfile):
             self.currentplan = open(currentplanfile).read().strip()
@@ -378,8 +423,15 @@ class Kbaseconfig:
         self.vmport = options.get('vmport', self.default['vmport'])
         self.vmrules = options.get('vmrules', self.default['vmrules'])
         self.cache = options.get('cache', self.default['cache'])
+        self.cachettl = options.get('cachettl', self.default['cachettl'])
+        self.threaded = options.get('threaded', self.default['threaded'])
+        self.maxthreads = options.get('maxthreads', self.default['maxthreads'])
+        self.waittimeout = options.get('waittimeout', self.default['waittimeout'])
         self.securitygroups = options.get('securitygroups', self.default['securitygroups'])
+        self.imagecache = options.get('imagecache', self.default['imagecache'])
+        self.imagecachesize = options.get('imagecachesize', self.default['imagecachesize'])
         self.overrides = {}
+        self.renders = OrderedDict()
 
     def switch_host(self, client):
         """
@@ -715,13 +767,35 @@ class Kbaseconfig:
 
     def process_inputfile(self, plan, inputfile, overrides={}, onfly=None, full=False, ignore=False,
                           download_mode=False):
+        return self._process_inputfile(plan, inputfile, overrides=overrides, onfly=onfly, full=full, ignore=ignore,
+                                       download_mode=download_mode)[0]
+
+    def _process_inputfile(self, plan, inputfile, overrides={}, onfly=None, full=False, ignore=False,
+                           download_mode=False):
         basedir = os.path.dirname(inputfile) if os.path.dirname(inputfile) != '' else '.'
         basefile = None
+        # a given file rendered with the same overrides gives the same result, as with baseplans of large plans,
+        # as long as none of the files read during the render changed and no volatile filter got used.
+        # dependencies are returned as None for renders which can't be cached, so that callers don't cache either
+        try:
+            renderkey = (plan, os.path.abspath(inputfile), str(onfly), full, ignore, download_mode,
+                         json.dumps([overrides, self.overrides], sort_keys=True, default=str))
+        except TypeError:
+            renderkey = None
+        if renderkey is not None and renderkey in self.renders:
+            dependencies, entries, newoverrides, basefile, basedir = self.renders[renderkey]
+            if [path for path in dependencies if _mtime(path) != dependencies[path]]:
+                del self.renders[renderkey]
+            else:
+                self.renders.move_to_end(renderkey)
+                entries = deepcopy(entries)
+                overrides.update(deepcopy(newoverrides))
+                return ((entries, overrides, basefile, basedir) if full else entries), dependencies
+        readfiles = [inputfile, "%s/%s_default.yml" % (basedir, plan), "%s/kcli_default.yml" % basedir,
+                     "%s/%s_default%s" % ((basedir,) + os.path.splitext(inputfile))]
+        dependencies = {os.path.abspath(path): _mtime(path) for path in readfiles}
         undefined = strictundefined if not ignore else defaultundefined
-        env = Environment(loader=FileSystemLoader(basedir), undefined=undefined, extensions=['jinja2.ext.do'],
-                          trim_blocks=True, lstrip_blocks=True)
-        for jinjafilter in jinjafilters.jinjafilters:
-            env.filters[jinjafilter] = jinjafilters.jinjafilters[jinjafilter]
+        env = common.get_jinja_env(basedir, undefined=undefined)
         try:
             templ = env.get_template(os.path.basename(inputfile))
         except TemplateSyntaxError as e:
@@ -747,8 +821,13 @@ class Kbaseconfig:
                 basefile = parameters['baseplan']
                 if onfly is not None:
                     common.fetch("%s/%s" % (onfly, basefile), '.')
-                baseparameters = self.process_inputfile(plan, basefile, overrides=overrides, onfly=onfly,
-                                                        full=True)[1]
+                baseinfo, basedependencies = self._process_inputfile(plan, basefile, overrides=overrides,
+                                                                     onfly=onfly, full=True)
+                if basedependencies is None:
+                    renderkey = None
+                else:
+                    dependencies.update(basedependencies)
+                baseparameters = baseinfo[1]
                 if baseparameters:
                     parameters.update({key: baseparameters[key] for key in baseparameters if key not in parameters})
                 baseparameters = common.get_parameters(basefile, planfile=True)
@@ -772,6 +851,8 @@ class Kbaseconfig:
             except TemplateError as e:
                 error("Error rendering inputfile %s. Got: %s" % (inputfile, e.message))
                 sys.exit(1)
+            if _template_dependencies(env, os.path.basename(inputfile), dependencies):
+                renderkey = None
             if not full:
                 entrieslist = entries.split('\n')
                 if entrieslist[0].startswith('parameters:'):
@@ -779,14 +860,23 @@ class Kbaseconfig:
                         if re.match(r'\S', line):
                             entries = '\n'.join(entrieslist[index + 1:])
                             break
-                return entries
+                self._store_render(renderkey, dependencies, entries, overrides, basefile, basedir)
+                return entries, dependencies if renderkey is not None else None
             entries = yaml.safe_load(entries)
         wrong_overrides = [y for y in overrides if '-' in y]
         if wrong_overrides:
             for wrong_override in wrong_overrides:
                 error("Incorrect parameter %s. Hyphens are not allowed" % wrong_override)
             sys.exit(1)
-        return entries, overrides, basefile, basedir
+        self._store_render(renderkey, dependencies, entries, overrides, basefile, basedir)
+        return (entries, overrides, basefile, basedir), dependencies if renderkey is not None else None
+
+    def _store_render(self, renderkey, dependencies, entries, overrides, basefile, basedir):
+        if renderkey is None:
+            return
+        self.renders[renderkey] = (dependencies, deepcopy(entries), deepcopy(overrides), basefile, basedir)
+        while len(self.renders) > RENDERS:
+            self.renders.popitem(last=False)
 
     def list_profiles(self):
         """
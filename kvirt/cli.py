@@ -17,36 +17,34 @@ from prettytable import PrettyTable
 import argcomplete
 import argparse
 from argparse import RawDescriptionHelpFormatter as rawhelp
+from datetime import datetime
 from glob import glob
+import json
 from kvirt import common
-from kvirt.common import error, pprint, success, warning
+from kvirt.common import error, pprint, success, warning, stream_table
 from kvirt import nameutils
 import os
+from queue import Empty, Queue
 import random
 import requests
 import sys
+from threading import BoundedSemaphore, Thread
+from time import time
 from urllib.parse import urlparse
 import yaml
 
 
 def cache_vms(baseconfig, region, zone, namespace):
-    cache_file = "%s/.kcli/%s_vms.yml" % (os.environ['HOME'], baseconfig.client)
-    if os.path.exists(cache_file):
-        with open(cache_file, 'r') as vms:
-            _list = yaml.safe_load(vms)
+    _list = common.get_cache(baseconfig.client, region=region, zone=zone, namespace=namespace,
+                             ttl=baseconfig.cachettl)
+    if _list is not None:
         pprint("Using cache information...")
     else:
         config = Kconfig(client=baseconfig.client, debug=baseconfig.debug, region=region, zone=zone,
                          namespace=namespace)
         _list = config.k.list()
-        with open(cache_file, 'w') as c:
-            pprint("Caching results for %s..." % baseconfig.client)
-            try:
-                yaml.safe_dump(_list, c, default_flow_style=False, encoding='utf-8', allow_unicode=True,
-                               sort_keys=False)
-            except:
-                yaml.safe_dump(_list, c, default_flow_style=False, encoding='utf-8', allow_unicode=True,
-                               sort_keys=False)
+        pprint("Caching results for %s..." % baseconfig.client)
+        common.set_cache(baseconfig.client, _list, region=region, zone=zone, namespace=namespace)
     return _list
 
 
@@ -129,10 +127,8 @@ def delete_cache(args):
     if not yes and not yes_top:
         common.confirm("Are you sure?")
     baseconfig = Kbaseconfig(client=args.client, debug=args.debug)
-    cache_file = "%s/.kcli/%s_vms.yml" % (os.environ['HOME'], baseconfig.client)
-    if os.path.exists(cache_file):
+    if common.delete_cache(baseconfig.client):
         pprint("Deleting cache on %s" % baseconfig.client)
-        os.remove(cache_file)
     else:
         warning("No cache file found for %s" % baseconfig.client)
 
@@ -146,6 +142,8 @@ def start_vm(args):
     for name in names:
         pprint("Starting vm %s..." % name)
         result = k.start(name)
+        if result['result'] == 'success':
+            config.update_cache(config.client, name, status='up')
         code = common.handle_response(result, name, element='', action='started')
         codes.append(code)
     sys.exit(1 if 1 in codes else 0)
@@ -166,7 +164,7 @@ def stop_vm(args):
     config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
     names = [common.get_lastvm(config.client)] if not args.names else args.names
     if config.extraclients:
-        ks = config.extraclients
+        ks = config.extraclients.copy()
         ks.update({config.client: config.k})
     else:
         ks = {config.client: config.k}
@@ -176,6 +174,8 @@ def stop_vm(args):
         for name in names:
             pprint("Stopping vm %s in %s..." % (name, cli))
             result = k.stop(name)
+            if result['result'] == 'success':
+                config.update_cache(cli, name, status='down')
             code = common.handle_response(result, name, element='', action='stopped')
             codes.append(code)
     sys.exit(1 if 1 in codes else 0)
@@ -186,7 +186,7 @@ def stop_container(args):
     config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
     names = [common.get_lastvm(config.client)] if not args.names else args.names
     if config.extraclients:
-        ks = config.extraclients
+        ks = config.extraclients.copy()
         ks.update({config.client: config.k})
     else:
         ks = {config.client: config.k}
@@ -280,6 +280,7 @@ def delete_vm(args):
                 success("%s deleted" % name)
                 codes.append(0)
                 common.set_lastvm(name, cli, delete=True)
+                config.update_cache(cli, name, delete=True)
             else:
                 reason = result['reason']
                 codes.append(1)
@@ -483,36 +484,96 @@ def sync_host(args):
         sys.exit(1)
 
 
+def list_client_vms(args, client):
+    """List vms of a single client"""
+    config = Kbaseconfig(client=client, debug=args.debug, quiet=True)
+    if config.cache:
+        return cache_vms(config, args.region, args.zone, args.namespace)
+    config = Kconfig(client=client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
+    return config.k.list(filters={'status': args.filters} if args.filters else None)
+
+
+def list_clients_vms(args, clients, maxthreads=10, timeout=0):
+    """List vms of several clients in parallel, yielding results as each client answers"""
+    results = Queue()
+    semaphore = BoundedSemaphore(maxthreads)
+
+    def _list(client):
+        with semaphore:
+            try:
+                results.put((client, list_client_vms(args, client), None))
+            except SystemExit:
+                results.put((client, [], "client initialization failed"))
+            except Exception as e:
+                results.put((client, [], e))
+    # daemon threads so that an unreachable client doesn't prevent from exiting
+    for client in clients:
+        Thread(target=_list, args=(client,), daemon=True).start()
+    deadline = time() + timeout if timeout > 0 else None
+    pending = list(clients)
+    while pending:
+        try:
+            client, vms, exc = results.get(timeout=max(deadline - time(), 0) if deadline is not None else None)
+        except Empty:
+            break
+        pending.remove(client)
+        yield client, vms, exc
+    for client in pending:
+        yield client, [], "timeout after %ss" % timeout
+
+
+def watch_vm(args):
+    """Watch vms, printing their changes as they happen"""
+    filters = args.filters
+    config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
+
+    def _rows():
+        for event, vm in config.watch_vms():
+            name = vm.get('name')
+            status = vm.get('status')
+            if config.cache:
+                config.update_cache(config.client, name, vm=vm, delete=event == 'deleted')
+            if filters and status != filters:
+                continue
+            yield [datetime.now().strftime("%H:%M:%S"), event, name, status, vm.get('ip', ''), vm.get('image', ''),
+                   vm.get('plan', ''), vm.get('profile', '')]
+    try:
+        stream_table(["Time", "Event", "Name", "Status", "Ips", "Source", "Plan", "Profile"], _rows(),
+                     widths=[8, 7, 20, 6, 15, 20, 10, 10])
+    except KeyboardInterrupt:
+        return
+
+
 def list_vm(args):
     """List vms"""
     filters = args.filters
+    if args.watch:
+        if args.client is not None and (args.client == 'all' or ',' in args.client):
+            error("Watching vms is only supported for a single client")
+            sys.exit(1)
+        return watch_vm(args)
     if args.client is not None and args.client == 'all':
         baseconfig = Kbaseconfig(client=args.client, debug=args.debug, quiet=True)
         args.client = ','.join(baseconfig.clients)
     if args.client is not None and ',' in args.client:
-        vms = PrettyTable(["Name", "Host", "Status", "Ips", "Source", "Plan", "Profile"])
-        for client in args.client.split(','):
-            config = Kbaseconfig(client=client, debug=args.debug, quiet=True)
-            if config.cache:
-                _list = cache_vms(config, args.region, args.zone, args.namespace)
-            else:
-                config = Kconfig(client=client, debug=args.debug, region=args.region,
-                                 zone=args.zone, namespace=args.namespace)
-                _list = config.k.list()
-            for vm in _list:
-                name = vm.get('name')
-                status = vm.get('status')
-                ip = vm.get('ip', '')
-                source = vm.get('image', '')
-                plan = vm.get('plan', '')
-                profile = vm.get('profile', '')
-                vminfo = [name, client, status, ip, source, plan, profile]
-                if filters:
-                    if status == filters:
-                        vms.add_row(vminfo)
-                else:
-                    vms.add_row(vminfo)
-        print(vms)
+        clients = args.client.split(',')
+        maxthreads = Kbaseconfig(client=clients[0], debug=args.debug, quiet=True).maxthreads
+        failedclients = []
+
+        def _rows():
+            for client, _list, exc in list_clients_vms(args, clients, maxthreads=maxthreads, timeout=args.timeout):
+                if exc is not None:
+                    failedclients.append("%s (%s)" % (client, exc))
+                for vm in sorted(_list, key=lambda x: x.get('name')):
+                    status = vm.get('status')
+                    if filters and status != filters:
+                        continue
+                    yield [vm.get('name'), client, status, vm.get('ip', ''), vm.get('image', ''), vm.get('plan', ''),
+                           vm.get('profile', '')]
+        stream_table(["Name", "Host", "Status", "Ips", "Source", "Plan", "Profile"], _rows(),
+                     widths=[20, 10, 6, 15, 20, 10, 10])
+        for failedclient in failedclients:
+            error("Couldn't list vms of client %s" % failedclient)
     else:
         vms = PrettyTable(["Name", "Status", "Ips", "Source", "Plan", "Profile"])
         config = Kbaseconfig(client=args.client, debug=args.debug, quiet=True)
@@ -521,7 +582,7 @@ def list_vm(args):
         else:
             config = Kconfig(client=args.client, debug=args.debug, region=args.region,
                              zone=args.zone, namespace=args.namespace)
-            _list = config.k.list()
+            _list = config.k.list(filters={'status': filters} if filters else None)
         for vm in _list:
             name = vm.get('name')
             status = vm.get('status')
@@ -1176,12 +1237,14 @@ def create_vm(args):
         result = config.create_vm(name, profile, overrides=overrides, customprofile=customprofile, wait=wait,
                                   onlyassets=onlyassets)
         if not onlyassets:
+            k = config.client_k(result.get('client'))
             if console:
-                config.k.console(name=name, tunnel=config.tunnel)
+                k.console(name=name, tunnel=config.tunnel)
             elif serial:
-                config.k.serialconsole(name)
+                k.serialconsole(name)
             else:
-                code = common.handle_response(result, name, element='', action='created', client=config.client)
+                code = common.handle_response(result, name, element='', action='created',
+                                              client=result.get('client', config.client))
                 return code
         elif 'reason' in result:
             error(result['reason'])
@@ -1197,7 +1260,7 @@ def create_vm(args):
                                       onlyassets=onlyassets)
             if not onlyassets:
                 codes.append(common.handle_response(result, currentname, element='', action='created',
-                                                    client=config.client))
+                                                    client=result.get('client', config.client)))
         return max(codes)
 
 
@@ -1825,7 +1888,9 @@ def delete_plan(args):
     if not yes and not yes_top:
         common.confirm("Are you sure?")
     config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
-    config.delete_plan(plan)
+    result = config.delete_plan(plan)
+    if result['result'] != 'success':
+        sys.exit(1)
     return 0
 
 
@@ -2250,7 +2315,7 @@ def delete_snapshot_plan(args):
     snapshot = args.snapshot
     config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
     k = config.k
-    for vm in sorted(k.list(), key=lambda x: x['name']):
+    for vm in sorted(k.list(filters={'plan': plan}), key=lambda x: x['name']):
         name = vm['name']
         if vm['plan'] == plan:
             pprint("Deleting snapshot %s of vm %s..." % (snapshot, name))
@@ -2859,7 +2924,13 @@ def report_host(args):
     """Report info about host"""
     config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
     k = config.k
-    k.report()
+    if args.metrics:
+        if not hasattr(k, 'get_metrics'):
+            error("Metrics not available for client %s" % config.client)
+            sys.exit(1)
+        print(json.dumps(k.get_metrics(), indent=2))
+    else:
+        k.report()
 
 
 def switch_host(args):
@@ -3446,6 +3517,7 @@ def cli():
 
     hostreport_desc = 'Report Info About Host'
     hostreport_parser = argparse.ArgumentParser(add_help=False)
+    hostreport_parser.add_argument('--metrics', action='store_true', help='Report capacity metrics as json')
     hostreport_parser.set_defaults(func=report_host)
     info_subparsers.add_parser('host', parents=[hostreport_parser], description=hostreport_desc, help=hostreport_desc,
                                aliases=['client'])
@@ -4228,6 +4300,10 @@ def cli():
     vmlist_desc = 'List Vms'
     vmlist_parser = argparse.ArgumentParser(add_help=False)
     vmlist_parser.add_argument('--filters', choices=('up', 'down'))
+    vmlist_parser.add_argument('--timeout', help='Timeout in seconds when listing several clients. Defaults to 60',
+                               type=int, default=60)
+    vmlist_parser.add_argument('-w', '--watch', action='store_true',
+                               help='Watch vms, printing when they get created, deleted, started, stopped or get an ip')
     vmlist_parser.set_defaults(func=list_vm)
     list_subparsers.add_parser('vm', parents=[vmlist_parser], description=vmlist_desc, help=vmlist_desc,
                                aliases=['vms'])
@@ -2,11 +2,14 @@
 # coding=utf-8
 
 from ast import literal_eval
+from copy import deepcopy
 from kvirt.jinjafilters import jinjafilters
 from kvirt.defaults import UBUNTUS
+from kvirt import isofs
 from random import randint
 import base64
-from jinja2 import Environment, FileSystemLoader
+import fcntl
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from jinja2 import StrictUndefined as undefined
 from jinja2.exceptions import TemplateSyntaxError, TemplateError
 from distutils.spawn import find_executable
@@ -21,11 +24,15 @@ import json
 import os
 import sys
 from subprocess import call
-from shutil import copy2, move
+from shutil import copy2, move, rmtree
 from tempfile import TemporaryDirectory
+from time import time
 import yaml
 
 binary_types = ['bz2', 'deb', 'jpg', 'gz', 'jpeg', 'iso', 'png', 'rpm', 'tgz', 'zip', 'ks']
+jinjacachedir = '~/.kcli/jinjacache'
+jinjaenvs = {}
+parameterscache = {}
 
 ceo_yaml = """apiVersion: operator.openshift.io/v1
 kind: Etcd
@@ -39,6 +46,34 @@ spec:
     useUnsupportedUnsafeNonHANonProductionUnstableEtcd: true\n"""
 
 
+def get_jinja_env(basedir, undefined=undefined, trim_blocks=True, lstrip_blocks=True):
+    """
+    Return the jinja environment of basedir, created once per process with its bytecode cached across runs
+
+    :param basedir:
+    :param undefined:
+    :param trim_blocks:
+    :param lstrip_blocks:
+    :return:
+    """
+    basedir = os.path.abspath(basedir)
+    key = (basedir, undefined, trim_blocks, lstrip_blocks)
+    if key not in jinjaenvs:
+        bytecode_cache = None
+        cachedir = os.path.expanduser(jinjacachedir)
+        try:
+            os.makedirs(cachedir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(cachedir)
+        except OSError:
+            pass
+        env = Environment(loader=FileSystemLoader(basedir), undefined=undefined, extensions=['jinja2.ext.do'],
+                          trim_blocks=trim_blocks, lstrip_blocks=lstrip_blocks, bytecode_cache=bytecode_cache)
+        for jinjafilter in jinjafilters.jinjafilters:
+            env.filters[jinjafilter] = jinjafilters.jinjafilters[jinjafilter]
+        jinjaenvs[key] = env
+    return jinjaenvs[key]
+
+
 def url_exists(url):
     try:
         if url.startswith('https://github.com'):
@@ -375,10 +410,7 @@ def process_files(files=[], overrides={}):
                     content = base64.b64encode(f.read())
             elif overrides and render:
                 basedir = os.path.dirname(origin) if os.path.dirname(origin) != '' else '.'
-                env = Environment(loader=FileSystemLoader(basedir), undefined=undefined, extensions=['jinja2.ext.do'],
-                                  trim_blocks=True, lstrip_blocks=True)
-                for jinjafilter in jinjafilters.jinjafilters:
-                    env.filters[jinjafilter] = jinjafilters.jinjafilters[jinjafilter]
+                env = get_jinja_env(basedir)
                 try:
                     templ = env.get_template(os.path.basename(origin))
                     fileentries = templ.render(overrides)
@@ -454,9 +486,7 @@ def process_ignition_files(files=[], overrides={}):
                     content = f.read().encode("base64")
             elif overrides:
                 basedir = os.path.dirname(origin) if os.path.dirname(origin) != '' else '.'
-                env = Environment(loader=FileSystemLoader(basedir), undefined=undefined, extensions=['jinja2.ext.do'])
-                for jinjafilter in jinjafilters.jinjafilters:
-                    env.filters[jinjafilter] = jinjafilters.jinjafilters[jinjafilter]
+                env = get_jinja_env(basedir, trim_blocks=False, lstrip_blocks=False)
                 try:
                     templ = env.get_template(os.path.basename(origin))
                     fileentries = templ.render(overrides)
@@ -585,6 +615,22 @@ def warning(text):
     print('\033[%sm%s\033[0m' % (color, text))
 
 
+def stream_table(fields, rows, widths=None):
+    """Print rows as they get received, padding columns to the provided widths"""
+    widths = widths if widths is not None else [20] * len(fields)
+    widths = [max(len(field), width) for field, width in zip(fields, widths)]
+    border = '+' + '+'.join('-' * (width + 2) for width in widths) + '+'
+
+    def line(values):
+        return '|' + '|'.join(' %s ' % str(value).ljust(width) for value, width in zip(values, widths)) + '|'
+    print(border)
+    print(line(fields))
+    print(border, flush=True)
+    for row in rows:
+        print(line(row), flush=True)
+    print(border)
+
+
 def info2(text):
     color = '36'
     print('\033[%smINFO\033[0m %s' % (color, text))
@@ -691,6 +737,174 @@ def set_lastvm(name, client, delete=False):
         modified.write("%s %s\n%s" % (client, name, data))
 
 
+def get_cache_file(client, region=None, zone=None, namespace=None):
+    """
+
+    :param client:
+    :param region:
+    :param zone:
+    :param namespace:
+    :return:
+    """
+    scope = '_'.join([str(e) for e in [region, zone, namespace] if e is not None])
+    scope = scope if scope != '' else 'default'
+    return "%s/.kcli/cache/%s/%s_vms.json" % (os.environ.get('HOME'), client, scope)
+
+
+def get_cache(client, region=None, zone=None, namespace=None, ttl=None):
+    """
+
+    :param client:
+    :param region:
+    :param zone:
+    :param namespace:
+    :param ttl:
+    :return:
+    """
+    cache_file = get_cache_file(client, region=region, zone=zone, namespace=namespace)
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        with open(cache_file, 'r') as c:
+            data = json.load(c)
+    except (ValueError, OSError):
+        return None
+    if ttl is not None and ttl > 0 and time() - data.get('timestamp', 0) > ttl:
+        return None
+    return data.get('vms')
+
+
+def set_cache(client, vms, region=None, zone=None, namespace=None):
+    """
+
+    :param client:
+    :param vms:
+    :param region:
+    :param zone:
+    :param namespace:
+    :return:
+    """
+    cache_file = get_cache_file(client, region=region, zone=zone, namespace=namespace)
+    cachedir = os.path.dirname(cache_file)
+    if not os.path.exists(cachedir):
+        os.makedirs(cachedir, exist_ok=True)
+    tmpfile = "%s.tmp" % cache_file
+    with open("%s.lock" % cache_file, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        with open(tmpfile, 'w') as c:
+            json.dump({'timestamp': time(), 'vms': vms}, c, default=str)
+        os.replace(tmpfile, cache_file)
+
+
+def update_cache(client, name, vm=None, status=None, delete=False, region=None, zone=None, namespace=None):
+    """
+
+    :param client:
+    :param name:
+    :param vm:
+    :param status:
+    :param delete:
+    :param region:
+    :param zone:
+    :param namespace:
+    :return:
+    """
+    if 'HOME' not in os.environ:
+        return
+    cache_file = get_cache_file(client, region=region, zone=zone, namespace=namespace)
+    if not os.path.exists(cache_file):
+        return
+    tmpfile = "%s.tmp" % cache_file
+    with open("%s.lock" % cache_file, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(cache_file, 'r') as c:
+                data = json.load(c)
+        except (ValueError, OSError):
+            os.remove(cache_file)
+            return
+        vms = [v for v in data.get('vms', []) if v.get('name') != name]
+        if not delete:
+            current = [v for v in data.get('vms', []) if v.get('name') == name]
+            if vm is not None:
+                vms.append(vm)
+            elif current:
+                if status is not None:
+                    current[0]['status'] = status
+                vms.append(current[0])
+        data['vms'] = sorted(vms, key=lambda x: x['name'])
+        with open(tmpfile, 'w') as c:
+            json.dump(data, c, default=str)
+        os.replace(tmpfile, cache_file)
+
+
+def delete_cache(client):
+    """
+
+    :param client:
+    :return:
+    """
+    found = False
+    cachedir = "%s/.kcli/cache/%s" % (os.environ.get('HOME'), client)
+    if os.path.isdir(cachedir):
+        rmtree(cachedir)
+        found = True
+    oldcache_file = "%s/.kcli/%s_vms.yml" % (os.environ.get('HOME'), client)
+    if os.path.exists(oldcache_file):
+        os.remove(oldcache_file)
+        found = True
+    return found
+
+
+def vm_matches(vm, filters=None):
+    """
+
+    :param vm:
+    :param filters:
+    :return:
+    """
+    if not filters:
+        return True
+    for key in ['plan', 'kube', 'status']:
+        if filters.get(key) is not None and vm.get(key) != filters[key]:
+            return False
+    if filters.get('name') is not None and not vm.get('name', '').startswith(filters['name']):
+        return False
+    for key, value in filters.get('labels', {}).items():
+        if vm.get(key) != value:
+            return False
+    return True
+
+
+def vm_events(oldvm, newvm):
+    """
+
+    :param oldvm:
+    :param newvm:
+    :return:
+    """
+    if oldvm is None and newvm is None:
+        return []
+    if oldvm is None:
+        events = ['created']
+        if newvm.get('status') == 'up':
+            events.append('started')
+        if newvm.get('ip'):
+            events.append('ip')
+        return events
+    if newvm is None:
+        return ['deleted']
+    events = []
+    if oldvm.get('status') != newvm.get('status'):
+        if newvm.get('status') == 'up':
+            events.append('started')
+        elif oldvm.get('status') == 'up':
+            events.append('stopped')
+    if newvm.get('ip') and newvm.get('ip') != oldvm.get('ip'):
+        events.append('ip')
+    return events
+
+
 def remove_duplicates(oldlist):
     """
 
@@ -761,10 +975,19 @@ def get_overrides(paramfile=None, param=[]):
 
 def get_parameters(inputfile, planfile=False):
     """
+    Parse parameters of inputfile, reusing previous results as long as the file is unchanged
 
     :param inputfile:
     :return:
     """
+    stat = os.stat(inputfile)
+    key = (os.path.abspath(inputfile), stat.st_mtime_ns, stat.st_size, planfile)
+    if key not in parameterscache:
+        parameterscache[key] = _parse_parameters(inputfile, planfile=planfile)
+    return deepcopy(parameterscache[key])
+
+
+def _parse_parameters(inputfile, planfile=False):
     results = {}
     with open(inputfile, 'r') as entries:
         try:
@@ -1870,31 +2093,30 @@ def openshift_delete_app(config, appdir, overrides={}):
     return result
 
 
-def make_iso(name, tmpdir, userdata, metadata, netdata, openstack=False):
-    with open("%s/user-data" % tmpdir, 'w') as x:
-        x.write(userdata)
-    with open("%s/meta-data" % tmpdir, 'w') as y:
-        y.write(metadata)
-    if find_executable('mkisofs') is None and find_executable('genisoimage') is None:
-        error("mkisofs or genisoimage are required in order to create cloudinit iso")
-        sys.exit(1)
-    isocmd = 'genisoimage' if find_executable('genisoimage') is not None else 'mkisofs'
-    isocmd += " --quiet -o %s/%s.ISO --volid cidata" % (tmpdir, name)
+def get_cloudinit_iso(userdata, metadata, netdata, openstack=False):
+    """
+    Return the content of a nocloud or config-2 seed iso, built in memory
+
+    :param userdata:
+    :param metadata:
+    :param netdata:
+    :param openstack:
+    :return:
+    """
     if openstack:
-        os.makedirs("%s/root/openstack/latest" % tmpdir)
-        move("%s/user-data" % tmpdir, "%s/root/openstack/latest/user_data" % tmpdir)
-        move("%s/meta-data" % tmpdir, "%s/root/openstack/latest/meta_data.json" % tmpdir)
-        isocmd += " -V config-2 --joliet --rock %s/root" % tmpdir
-    else:
-        isocmd += " --joliet --rock %s/user-data %s/meta-data" % (tmpdir, tmpdir)
+        files = {'openstack/latest/user_data': userdata, 'openstack/latest/meta_data.json': metadata}
+        if netdata is not None:
+            files['openstack/latest/network_config.json'] = netdata
+        return isofs.make_iso(files, volid='config-2')
+    files = {'user-data': userdata, 'meta-data': metadata}
     if netdata is not None:
-        with open("%s/network-config" % tmpdir, 'w') as z:
-            z.write(netdata)
-        if openstack:
-            move("%s/network-config" % tmpdir, "%s/root/openstack/latest/network_config.json" % tmpdir)
-        else:
-            isocmd += " %s/network-config" % tmpdir
-    os.system(isocmd)
+        files['network-config'] = netdata
+    return isofs.make_iso(files, volid='cidata')
+
+
+def make_iso(name, tmpdir, userdata, metadata, netdata, openstack=False):
+    with open("%s/%s.ISO" % (tmpdir, name), 'wb') as f:
+        f.write(get_cloudinit_iso(userdata, metadata, netdata, openstack=openstack))
 
 
 def patch_bootstrap(path, script_content, service_content, service_name):
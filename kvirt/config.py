@@ -5,6 +5,8 @@ Kvirt config class
 """
 
 import base64
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait as wait_futures
 from datetime import datetime
 import json
 from jinja2 import Environment, FileSystemLoader
@@ -14,6 +16,7 @@ from kvirt.defaults import IMAGES, IMAGESCOMMANDS
 from kvirt import ansibleutils
 from kvirt.jinjafilters import jinjafilters
 from kvirt import nameutils
+from kvirt import scheduler
 from kvirt import common
 from kvirt.common import error, pprint, success, warning, generate_rhcos_iso, pwd_path
 from kvirt.common import ssh, scp, _ssh_credentials
@@ -33,9 +36,10 @@ import re
 import socket
 from shutil import rmtree
 import sys
-from subprocess import call
+from subprocess import call, Popen, PIPE, DEVNULL
 from tempfile import TemporaryDirectory
-from time import sleep
+from threading import Lock, Timer
+from time import sleep, time
 import webbrowser
 import yaml
 
@@ -72,16 +76,75 @@ systemctl daemon-reload ;\
 fi'"""
 
 
+class Kextraclients(MutableMapping):
+    """Providers of the extra clients of a group, only connected when first accessed"""
+
+    def __init__(self, connect, clients=[]):
+        self._connect = connect
+        self._clients = {client: None for client in clients}
+        self._locks = {client: Lock() for client in clients}
+
+    def _get(self, client):
+        with self._locks[client]:
+            if self._clients[client] is None:
+                self._clients[client] = self._connect(client)
+        return self._clients[client]
+
+    def connect(self):
+        """Connect concurrently to all the clients not connected yet"""
+        pending = [client for client in self._clients if self._clients[client] is None]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            for future in [executor.submit(self._get, client) for client in pending]:
+                future.result()
+
+    def copy(self):
+        self.connect()
+        return dict(self._clients)
+
+    def items(self):
+        self.connect()
+        return self._clients.items()
+
+    def values(self):
+        self.connect()
+        return self._clients.values()
+
+    def __getitem__(self, client):
+        if client not in self._clients:
+            raise KeyError(client)
+        return self._get(client)
+
+    def __setitem__(self, client, k):
+        self._locks.setdefault(client, Lock())
+        self._clients[client] = k
+
+    def __delitem__(self, client):
+        del self._clients[client]
+
+    def __iter__(self):
+        return iter(self._clients)
+
+    def __len__(self):
+        return len(self._clients)
+
+
 class Kconfig(Kbaseconfig):
     """
 
     """
-    def __init__(self, client=None, debug=False, quiet=False, region=None, zone=None, namespace=None):
+    def __init__(self, client=None, debug=False, quiet=False, region=None, zone=None, namespace=None,
+                 connections=None):
         Kbaseconfig.__init__(self, client=client, debug=debug, quiet=quiet)
+        self.cachescope = {'region': region, 'zone': zone, 'namespace': namespace}
+        self.connections = connections
         if not self.enabled:
             k = None
         else:
-            if self.type == 'kubevirt':
+            if connections is not None:
+                k = connections(self.client)
+            elif self.type == 'kubevirt':
                 if namespace is None:
                     namespace = self.options.get('namespace')
                 context = self.options.get('context')
@@ -127,7 +190,6 @@ class Kconfig(Kbaseconfig):
                              datavolumes=datavolumes, disk_hotplug=disk_hotplug, readwritemany=readwritemany,
                              registry=registry, access_mode=access_mode, volume_mode=volume_mode,
                              volume_access=volume_access, harvester=harvester)
-                self.host = k.host
             elif self.type == 'gcp':
                 credentials = self.options.get('credentials')
                 if credentials is not None:
@@ -142,9 +204,9 @@ class Kconfig(Kbaseconfig):
                 zone = self.options.get('zone', 'europe-west1-b') if zone is None else zone
                 region = self.options.get('region') if region is None else region
                 region = zone[:-2] if region is None else region
+                allzones = self.options.get('allzones', False)
                 from kvirt.providers.gcp import Kgcp
-                k = Kgcp(region=region, zone=zone, project=project, debug=debug)
-                self.overrides.update({'project': project})
+                k = Kgcp(region=region, zone=zone, project=project, debug=debug, allzones=allzones)
             elif self.type == 'aws':
                 if len(self.options) == 1:
                     home = os.environ['HOME']
@@ -291,7 +353,6 @@ class Kconfig(Kbaseconfig):
                            debug=debug, datacenter=datacenter, cluster=cluster, ca_file=ca_file, org=org,
                            imagerepository=imagerepository, filtervms=filtervms, filteruser=filteruser,
                            filtertag=filtertag)
-                self.overrides.update({'host': self.host, 'user': user, 'password': password})
             elif self.type == 'openstack':
                 version = self.options.get('version', '2')
                 domain = next((e for e in [self.options.get('domain'),
@@ -375,32 +436,19 @@ class Kconfig(Kbaseconfig):
                 remotednsmasq = self.options.get('remotednsmasq', False)
                 from kvirt.providers.kvm import Kvirt
                 k = Kvirt(host=self.host, port=self.port, user=self.user, protocol=self.protocol, url=self.url,
-                          debug=debug, insecure=self.insecure, session=session, remotednsmasq=remotednsmasq)
+                          debug=debug, insecure=self.insecure, session=session, remotednsmasq=remotednsmasq,
+                          imagecache=self.imagecache, imagecachesize=self.imagecachesize)
             if k.conn is None:
                 error("Couldn't connect to client %s. Leaving..." % self.client)
                 sys.exit(1)
-            for extraclient in self._extraclients:
-                if extraclient not in self.ini:
-                    warning("Missing section for client %s in config file. Trying to connect..." % extraclient)
-                    self.ini[extraclient] = {'host': extraclient}
-                c = Kconfig(client=extraclient)
-                e = c.k
-                self.extraclients[extraclient] = e
-                if e.conn is None:
-                    error("Couldn't connect to specify hypervisor %s. Leaving..." % extraclient)
-                    sys.exit(1)
+            self._post_connect(k)
+            self.extraclients = Kextraclients(self.connect_extraclient, self._extraclients)
             if hasattr(self, 'algorithm'):
                 if self.algorithm == 'free':
-                    upstatus = ['active', 'up', 'running']
                     allclis = {self.client: k}
-                    allclis.update(self.extraclients)
-                    mincli, minvms = None, None
-                    for cli in allclis:
-                        clivms = len([vm for vm in allclis[cli].list() if vm['status'].lower() in upstatus])
-                        if minvms is None or clivms < minvms:
-                            mincli = cli
-                            minvms = clivms
-                    if mincli != self.client:
+                    allclis.update(self.extraclients.copy())
+                    mincli = scheduler.select_client(allclis)
+                    if mincli is not None and mincli != self.client:
                         self.extraclients[self.client] = k
                         k = self.extraclients[mincli]
                         del self.extraclients[mincli]
@@ -436,6 +484,53 @@ class Kconfig(Kbaseconfig):
         self.overrides.update(default_data)
         self.overrides.update(config_data)
 
+    def _post_connect(self, k):
+        """Apply settings derived from the provider, whether it was just created or taken from a pool"""
+        if self.type == 'kubevirt':
+            self.host = k.host
+        elif self.type == 'gcp':
+            self.overrides.update({'project': self.options.get('project')})
+        elif self.type == 'ovirt':
+            self.overrides.update({'host': self.host, 'user': self.options.get('user', 'admin@internal'),
+                                   'password': self.options.get('password')})
+
+    def connect_extraclient(self, extraclient):
+        """Connect to an extra client of the group"""
+        if extraclient not in self.ini:
+            warning("Missing section for client %s in config file. Trying to connect..." % extraclient)
+            self.ini[extraclient] = {'host': extraclient}
+        e = self.connections(extraclient) if self.connections is not None else Kconfig(client=extraclient).k
+        if e.conn is None:
+            error("Couldn't connect to specify hypervisor %s. Leaving..." % extraclient)
+            sys.exit(1)
+        return e
+
+    def client_settings(self, client=None):
+        """Return connection and tunnel settings of client, defaulting to the current one"""
+        if client is None or client == self.client:
+            return {'host': self.host, 'port': self.port, 'user': self.user, 'type': self.type,
+                    'tunnel': self.tunnel, 'tunnelhost': self.tunnelhost, 'tunnelport': self.tunnelport,
+                    'tunneluser': self.tunneluser, 'insecure': self.insecure}
+        options = self.ini.get(client, {})
+        host = options.get('host', '127.0.0.1')
+        if ':' in host and '[' not in host:
+            host = '[%s]' % host
+        settings = {'host': host, 'port': options.get('port', 22), 'user': options.get('user', 'root'),
+                    'type': options.get('type', 'kvm'), 'tunnel': bool(options.get('tunnel', self.default['tunnel'])),
+                    'tunnelhost': options.get('tunnelhost', self.default['tunnelhost']),
+                    'tunnelport': options.get('tunnelport', self.default['tunnelport']),
+                    'tunneluser': options.get('tunneluser', self.default['tunneluser']),
+                    'insecure': bool(options.get('insecure', self.default['insecure']))}
+        if settings['tunnelhost'] is None and settings['type'] == 'kvm' and host != '127.0.0.1':
+            settings.update({'tunnelhost': host, 'tunnelport': settings['port'], 'tunneluser': settings['user']})
+        return settings
+
+    def client_k(self, client=None):
+        """Return the provider of client, which is either the current one or a member of its group"""
+        if client is None or client == self.client:
+            return self.k
+        return self.extraclients[client]
+
     def create_vm(self, name, profile, overrides={}, customprofile={}, k=None,
                   plan='kvirt', basedir='.', client=None, onfly=None, wait=False, onlyassets=False):
         """
@@ -677,9 +772,6 @@ class Kconfig(Kbaseconfig):
         iso = profile.get('iso', default_iso)
         vnc = profile.get('vnc', default_vnc)
         cloudinit = profile.get('cloudinit', default_cloudinit)
-        if cloudinit and self.type == 'kvm' and\
-                find_executable('mkisofs') is None and find_executable('genisoimage') is None:
-            return {'result': 'failure', 'reason': "Missing mkisofs/genisoimage needed for cloudinit"}
         reserveip = profile.get('reserveip', default_reserveip)
         reservedns = profile.get('reservedns', default_reservedns)
         reservehost = profile.get('reservehost', default_reservehost)
@@ -978,6 +1070,19 @@ class Kconfig(Kbaseconfig):
                                         domain=domain, reserveip=reserveip, files=files, enableroot=enableroot,
                                         overrides=overrides, image=image, storemetadata=False)[0]
             return {'result': 'success', 'data': data}
+        if getattr(self, 'algorithm', None) == 'free' and self.extraclients and k is self.k:
+            allclis = {self.client: k}
+            allclis.update(self.extraclients.copy())
+            vmdisksize = scheduler.disks_size(disks, disksize=disksize)
+            vmnets = [net.get('name') if isinstance(net, dict) else net for net in nets]
+            vmnets = [net for net in vmnets if net is not None]
+            vmclient = scheduler.select_client(allclis, memory=int(memory), numcpus=int(numcpus), pool=pool,
+                                               disksize=vmdisksize, image=image, nets=vmnets)
+            if vmclient is None:
+                warning("No member of group %s has the capacity, image and networks needed by %s" % (self.group, name))
+            elif vmclient != self.client:
+                pprint("Placing vm %s on client %s" % (name, vmclient))
+                k, client = allclis[vmclient], vmclient
         result = k.create(name=name, virttype=virttype, plan=plan, profile=profilename, flavor=flavor,
                           cpumodel=cpumodel, cpuflags=cpuflags, cpupinning=cpupinning, numamode=numamode, numa=numa,
                           numcpus=int(numcpus), memory=int(memory), guestid=guestid, pool=pool,
@@ -992,6 +1097,8 @@ class Kconfig(Kbaseconfig):
                           pcidevices=pcidevices, tpm=tpm, rng=rng, metadata=metadata, securitygroups=securitygroups)
         if result['result'] != 'success':
             return result
+        client = client if client is not None else self.client
+        settings = self.client_settings(client)
         if dnsclient is not None and domain is not None:
             if dnsclient in self.clients:
                 z = Kconfig(client=dnsclient).k
@@ -1025,20 +1132,149 @@ class Kconfig(Kbaseconfig):
                     verbose = element.get('verbose', False)
                     user = element.get('user')
                     ansibleutils.play(k, name, playbook=playbook, variables=variables, verbose=verbose, user=user,
-                                      tunnel=self.tunnel, tunnelhost=self.host, tunnelport=self.port,
-                                      tunneluser=self.user, yamlinventory=yamlinventory, insecure=self.insecure)
+                                      tunnel=settings['tunnel'], tunnelhost=settings['host'],
+                                      tunnelport=settings['port'], tunneluser=settings['user'],
+                                      yamlinventory=yamlinventory, insecure=settings['insecure'])
         if os.access(os.path.expanduser('~/.kcli'), os.W_OK):
-            client = client if client is not None else self.client
             common.set_lastvm(name, client)
+            if self.cache:
+                self.update_cache(client, name, vm=k.info(name))
         if wait:
             if not cloudinit or not start or image is None:
                 pprint("Skipping wait on %s" % name)
             else:
-                self.wait(name, image=image)
+                if not self.wait(name, image=image, timeout=self.waittimeout, k=k, client=client):
+                    return {'result': 'failure', 'reason': "Timeout waiting for vm %s" % name, 'client': client}
                 finishfiles = profile.get('finishfiles', [])
                 if finishfiles:
-                    self.handle_finishfiles(name, finishfiles)
-        return {'result': 'success', 'vm': name}
+                    self.handle_finishfiles(name, finishfiles, k=k, client=client)
+        return {'result': 'success', 'vm': name, 'client': client}
+
+    def deploy_plan_vm(self, name, vmdata):
+        """Create a vm of a plan and handle its synchronous wait"""
+        profile = vmdata['profile']
+        onlyassets = vmdata['onlyassets']
+        result = self.create_vm(name, vmdata['profilename'], overrides=vmdata['overrides'], customprofile=profile,
+                                k=vmdata['k'], plan=vmdata['plan'], basedir=vmdata['basedir'],
+                                client=vmdata['client'], onfly=vmdata['onfly'], onlyassets=onlyassets)
+        if onlyassets:
+            return result
+        client = result.get('client', vmdata['client'])
+        common.handle_response(result, name, client=client)
+        if result['result'] != 'success':
+            return result
+        k = vmdata['k'] if client == vmdata['client'] else self.client_k(client)
+        start = profile.get('start', True)
+        cloudinit = profile.get('cloudinit', True)
+        wait = profile.get('wait', False)
+        asyncwait = profile.get('asyncwait', False)
+        finishfiles = profile.get('finishfiles', [])
+        if not wait and not asyncwait:
+            return result
+        elif not start or not cloudinit or profile.get('image') is None:
+            pprint("Skipping wait on %s" % name)
+        elif not asyncwait:
+            if not self.wait(name, timeout=self.waittimeout, k=k, client=client):
+                return {'result': 'failure', 'reason': "Timeout waiting for vm %s" % name, 'client': client}
+            if finishfiles:
+                self.handle_finishfiles(name, finishfiles, k=k, client=client)
+        return result
+
+    def deploy_plan_vms(self, vms, maxthreads=10):
+        """Create vms of a plan in parallel, starting vms listed in depends only once those are deployed"""
+        pending = list(vms)
+        running = {}
+        results = {}
+        with ThreadPoolExecutor(max_workers=maxthreads) as executor:
+            while pending or running:
+                for name in pending[:]:
+                    depends = vms[name]['profile'].get('depends', [])
+                    depends = [depends] if isinstance(depends, str) else depends
+                    if [d for d in depends if d in pending or d in running.values()]:
+                        continue
+                    pending.remove(name)
+                    faileddepends = [d for d in depends if d in results and results[d]['result'] != 'success']
+                    if faileddepends:
+                        reason = "depending on failed vms %s" % ','.join(faileddepends)
+                        results[name] = {'result': 'failure', 'reason': reason}
+                        error("%s not deployed because %s" % (name, reason))
+                        continue
+                    running[executor.submit(self.deploy_plan_vm, name, vms[name])] = name
+                if not running:
+                    for name in pending:
+                        reason = "circular dependencies"
+                        results[name] = {'result': 'failure', 'reason': reason}
+                        error("%s not deployed because of %s" % (name, reason))
+                    break
+                done, _ = wait_futures(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        results[name] = {'result': 'failure', 'reason': str(e)}
+                        error("Hit %s when deploying %s" % (e, name))
+        return [(name, vms[name]['profile'], results[name]) for name in vms]
+
+    def watch_vms(self, interval=5):
+        """Yield (event, vm) tuples when vms get created, deleted, started, stopped or acquire an ip"""
+        k = self.k
+        vms = {vm['name']: vm for vm in k.list()}
+        if not hasattr(k, 'watch_vms'):
+            while True:
+                sleep(interval)
+                newvms = {vm['name']: vm for vm in k.list()}
+                for name in sorted(set(vms) | set(newvms)):
+                    for event in common.vm_events(vms.get(name), newvms.get(name)):
+                        yield event, newvms.get(name, vms.get(name))
+                vms = newvms
+        for name in k.watch_vms(timeout=interval):
+            if name is not None:
+                names = [name]
+            else:
+                # ips aren't reported through events, so refresh running vms still lacking one
+                names = [n for n in vms if vms[n].get('status') == 'up' and not vms[n].get('ip')]
+            for name in names:
+                newvm = (k.info(name) or None) if k.exists(name) else None
+                for event in common.vm_events(vms.get(name), newvm):
+                    yield event, newvm if newvm is not None else vms[name]
+                if newvm is not None:
+                    vms[name] = newvm
+                elif name in vms:
+                    del vms[name]
+
+    def wait_vms(self, vms, timeout=0, threaded=None, maxthreads=None):
+        """Wait for several vms, in parallel when threaded, handling finishfiles of each vm as soon as it is ready"""
+        names = [vm['name'] for vm in vms]
+        pprint("Waiting for vms %s to finish customisation" % ','.join(names))
+        threaded = self.threaded if threaded is None else threaded
+        maxthreads = self.maxthreads if maxthreads is None else maxthreads
+        maxthreads = min(maxthreads, len(vms)) if threaded else 1
+        quiet = maxthreads > 1
+        timedoutvms = []
+        starttime = time()
+        with ThreadPoolExecutor(max_workers=maxthreads) as executor:
+            futures = {}
+            for vm in vms:
+                futures[executor.submit(self.wait, vm['name'], quiet=quiet, timeout=timeout, k=vm.get('k'),
+                                        client=vm.get('client'))] = vm
+            for index, future in enumerate(as_completed(futures)):
+                name, finishfiles = futures[future]['name'], futures[future]['finishfiles']
+                try:
+                    ready = future.result()
+                except Exception as e:
+                    error("Hit %s when waiting for %s" % (e, name))
+                    ready = False
+                elapsed = int(time() - starttime)
+                if not ready:
+                    timedoutvms.append(name)
+                    error("Vm %s not ready after %ss (%s/%s)" % (name, elapsed, index + 1, len(vms)))
+                    continue
+                success("Vm %s ready after %ss (%s/%s)" % (name, elapsed, index + 1, len(vms)))
+                if finishfiles:
+                    self.handle_finishfiles(name, finishfiles, k=futures[future].get('k'),
+                                            client=futures[future].get('client'))
+        return timedoutvms
 
     def list_plans(self):
         """
@@ -1138,6 +1374,87 @@ class Kconfig(Kbaseconfig):
             pprint("Product can be deleted with: kcli delete plan --yes %s" % plan)
         return {'result': 'success', 'plan': plan}
 
+    def update_cache(self, client, name, **kwargs):
+        """Update the cached listing of client, in the scope this config was created with when it's the main one"""
+        scope = self.cachescope if client == self.client else {}
+        common.update_cache(client, name, **scope, **kwargs)
+
+    def get_plan_vms(self, c, plan):
+        """Retrieve vms of a plan, using a metadata only query when the provider supports it"""
+        if hasattr(c, 'list_plan_vms'):
+            return c.list_plan_vms(plan)
+        return [vm for vm in c.list(filters={'plan': plan}) if vm.get('plan') == plan]
+
+    def handle_plan_vms(self, plan, clients, action, **kwargs):
+        """Run action on the vms of a plan, concurrently across clients and, when threaded, within each client"""
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(len(clients), 1)) as executor:
+            futures = {executor.submit(self._handle_client_plan_vms, plan, hypervisor, clients[hypervisor], action,
+                                       **kwargs): hypervisor for hypervisor in clients}
+            for future in as_completed(futures):
+                hypervisor = futures[future]
+                try:
+                    results[hypervisor] = future.result()
+                except Exception as e:
+                    error("Hit %s when handling vms of plan %s on %s" % (e, plan, hypervisor))
+                    results[hypervisor] = {}
+        return results
+
+    def _handle_client_plan_vms(self, plan, hypervisor, c, action, **kwargs):
+        results = {}
+        vms = self.get_plan_vms(c, plan)
+        if not vms:
+            return results
+        # providers share a single connection, so vms of a client are only handled in parallel when asked to
+        maxthreads = self.maxthreads if self.threaded else 1
+        with ThreadPoolExecutor(max_workers=maxthreads) as executor:
+            futures = {executor.submit(action, hypervisor, c, vm, **kwargs): vm['name'] for vm in vms}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'result': 'failure', 'reason': str(e)}
+                if not isinstance(result, dict):
+                    result = {'result': 'success'}
+                if result['result'] != 'success':
+                    error("Hit %s when handling %s on %s" % (result.get('reason'), name, hypervisor))
+                results[name] = result
+        return results
+
+    def _start_plan_vm(self, hypervisor, c, vm):
+        result = c.start(vm['name'])
+        if result is None or result['result'] == 'success':
+            success("%s started on %s!" % (vm['name'], hypervisor))
+        return result
+
+    def _stop_plan_vm(self, hypervisor, c, vm):
+        result = c.stop(vm['name'])
+        if result is None or result['result'] == 'success':
+            success("%s stopped on %s!" % (vm['name'], hypervisor))
+        return result
+
+    def _snapshot_plan_vm(self, hypervisor, c, vm, snapshotname=None, revert=False):
+        result = c.snapshot(snapshotname, vm['name'], revert=revert)
+        if result is None or result['result'] == 'success':
+            msg = "snapshot of %s reverted!" % vm['name'] if revert else "%s snapshotted!" % vm['name']
+            success(msg)
+        return result
+
+    def _delete_plan_vm(self, hypervisor, c, vm):
+        name = vm['name']
+        networks = c.vm_ports(name)
+        dnsclient, domain = c.dnsinfo(name)
+        result = c.delete(name, snapshots=True)
+        result = {'result': 'success'} if result is None else result.copy()
+        if result['result'] == 'success':
+            success("%s deleted on %s!" % (name, hypervisor))
+        result['networks'] = networks
+        result['dnsclient'], result['domain'] = dnsclient, domain
+        if vm.get('loadbalancer') is not None:
+            result['loadbalancers'] = vm['loadbalancer'].split(',')
+        return result
+
     def start_plan(self, plan, container=False):
         k = self.k
         startfound = False
@@ -1145,17 +1462,14 @@ class Kconfig(Kbaseconfig):
         if not self.extraclients:
             startclients = {self.client: k}
         else:
-            startclients = self.extraclients
+            startclients = self.extraclients.copy()
             startclients.update({self.client: k})
-        for hypervisor in startclients:
-            c = startclients[hypervisor]
-            for vm in sorted(c.list(), key=lambda x: x['name']):
-                name = vm['name']
-                description = vm.get('plan')
-                if description == plan:
-                    startfound = True
-                    c.start(name)
-                    success("%s started on %s!" % (name, hypervisor))
+        results = self.handle_plan_vms(plan, startclients, self._start_plan_vm)
+        for hypervisor in results:
+            for name in results[hypervisor]:
+                startfound = True
+                if results[hypervisor][name]['result'] == 'success':
+                    self.update_cache(hypervisor, name, status='up')
         if container:
             cont = Kcontainerconfig(self, client=self.containerclient).cont
             for conta in sorted(cont.list_containers(k)):
@@ -1178,17 +1492,14 @@ class Kconfig(Kbaseconfig):
         if not self.extraclients:
             stopclients = {self.client: k}
         else:
-            stopclients = self.extraclients
+            stopclients = self.extraclients.copy()
             stopclients.update({self.client: k})
-        for hypervisor in stopclients:
-            c = stopclients[hypervisor]
-            for vm in sorted(c.list(), key=lambda x: x['name']):
-                name = vm['name']
-                description = vm.get('plan')
-                if description == plan:
-                    stopfound = True
-                    c.stop(name)
-                    success("%s stopped on %s!" % (name, hypervisor))
+        results = self.handle_plan_vms(plan, stopclients, self._stop_plan_vm)
+        for hypervisor in results:
+            for name in results[hypervisor]:
+                stopfound = True
+                if results[hypervisor][name]['result'] == 'success':
+                    self.update_cache(hypervisor, name, status='down')
         if container:
             cont = Kcontainerconfig(self, client=self.containerclient).cont
             for conta in sorted(cont.list_containers()):
@@ -1207,7 +1518,7 @@ class Kconfig(Kbaseconfig):
     def autostart_plan(self, plan):
         k = self.k
         pprint("Set vms from plan %s to autostart" % plan)
-        for vm in sorted(k.list(), key=lambda x: x['name']):
+        for vm in sorted(k.list(filters={'plan': plan}), key=lambda x: x['name']):
             name = vm['name']
             description = vm['plan']
             if description == plan:
@@ -1218,7 +1529,7 @@ class Kconfig(Kbaseconfig):
     def noautostart_plan(self, plan):
         k = self.k
         pprint("Preventing vms from plan %s to autostart" % plan)
-        for vm in sorted(k.list(), key=lambda x: x['name']):
+        for vm in sorted(k.list(filters={'plan': plan}), key=lambda x: x['name']):
             name = vm['name']
             description = vm['plan']
             if description == plan:
@@ -1230,7 +1541,7 @@ class Kconfig(Kbaseconfig):
         k = self.k
         deletedvms = []
         deletedlbs = []
-        dnsclients = []
+        dnsclients = {}
         networks = []
         if plan == '':
             error("That would delete every vm...Not doing that")
@@ -1239,36 +1550,31 @@ class Kconfig(Kbaseconfig):
         if not self.extraclients:
             deleteclients = {self.client: k}
         else:
-            deleteclients = self.extraclients
+            deleteclients = self.extraclients.copy()
             deleteclients.update({self.client: k})
-        for hypervisor in deleteclients:
-            c = deleteclients[hypervisor]
-            for vm in sorted(c.list(), key=lambda x: x['name']):
-                name = vm['name']
-                description = vm.get('plan')
-                if description == plan:
-                    if 'loadbalancer' in vm:
-                        lbs = vm['loadbalancer'].split(',')
-                        for lb in lbs:
-                            if lb not in deletedlbs:
-                                deletedlbs.append(lb)
-                    vmnetworks = c.vm_ports(name)
-                    for network in vmnetworks:
-                        if network != 'default' and network not in networks:
-                            networks.append(network)
-                    dnsclient, domain = c.dnsinfo(name)
-                    c.delete(name, snapshots=True)
-                    if dnsclient is not None and domain is not None and dnsclient in self.clients:
-                        if dnsclient in dnsclients:
-                            z = dnsclients[dnsclient]
-                        elif dnsclient in self.clients:
-                            z = Kconfig(client=dnsclient).k
-                            dnsclients[dnsclient] = z
-                        z.delete_dns(dnsclient, domain)
-                    common.set_lastvm(name, self.client, delete=True)
-                    success("%s deleted on %s!" % (name, hypervisor))
-                    deletedvms.append(name)
-                    found = True
+        failedvms = []
+        results = self.handle_plan_vms(plan, deleteclients, self._delete_plan_vm)
+        for hypervisor in sorted(results):
+            for name in sorted(results[hypervisor]):
+                found = True
+                result = results[hypervisor][name]
+                if result['result'] != 'success':
+                    failedvms.append(name)
+                    continue
+                for lb in result.get('loadbalancers', []):
+                    if lb not in deletedlbs:
+                        deletedlbs.append(lb)
+                for network in result.get('networks', []):
+                    if network != 'default' and network not in networks:
+                        networks.append(network)
+                dnsclient, domain = result.get('dnsclient'), result.get('domain')
+                if dnsclient is not None and domain is not None and dnsclient in self.clients:
+                    if dnsclient not in dnsclients:
+                        dnsclients[dnsclient] = Kconfig(client=dnsclient).k
+                    dnsclients[dnsclient].delete_dns(name, domain)
+                common.set_lastvm(name, self.client, delete=True)
+                self.update_cache(hypervisor, name, delete=True)
+                deletedvms.append(name)
         if container:
             cont = Kcontainerconfig(self, client=self.containerclient).cont
             for conta in sorted(cont.list_containers(k)):
@@ -1302,6 +1608,10 @@ class Kconfig(Kbaseconfig):
         if deletedlbs and self.type in ['aws', 'gcp']:
             for lb in deletedlbs:
                 self.k.delete_loadbalancer(lb)
+        if failedvms:
+            error("Plan %s not fully deleted" % plan)
+            return {'result': 'failure', 'reason': 'The following vm failed: %s' % ','.join(failedvms),
+                    'deletedvm': deletedvms}
         if found:
             success("Plan %s deleted!" % plan)
         else:
@@ -1316,13 +1626,9 @@ class Kconfig(Kbaseconfig):
         if snapshotname is None:
             warning("Using %s as snapshot name as None was provided" % plan)
             snapshotname = plan
-        for vm in sorted(k.list(), key=lambda x: x['name']):
-            name = vm['name']
-            description = vm['plan']
-            if description == plan:
-                snapshotfound = True
-                k.snapshot(snapshotname, name)
-                success("%s snapshotted!" % name)
+        results = self.handle_plan_vms(plan, {self.client: k}, self._snapshot_plan_vm, snapshotname=snapshotname)
+        if results[self.client]:
+            snapshotfound = True
         if snapshotfound:
             success("Plan %s snapshotted!" % plan)
         else:
@@ -1336,13 +1642,10 @@ class Kconfig(Kbaseconfig):
         if snapshotname is None:
             warning("Using %s as snapshot name as None was provided" % plan)
             snapshotname = plan
-        for vm in sorted(k.list(), key=lambda x: x['name']):
-            name = vm['name']
-            description = vm['plan']
-            if description == plan:
-                revertfound = True
-                k.snapshot(snapshotname, name, revert=True)
-                success("snapshot of %s reverted!" % name)
+        results = self.handle_plan_vms(plan, {self.client: k}, self._snapshot_plan_vm, snapshotname=snapshotname,
+                                       revert=True)
+        if results[self.client]:
+            revertfound = True
         if revertfound:
             success("Plan %s reverted with snapshot %s!" % (plan, snapshotname))
         else:
@@ -1657,6 +1960,11 @@ class Kconfig(Kbaseconfig):
             vmcounter = 0
             hosts = {}
             vms_to_host = {}
+            vmresults = []
+            threadedvms = {}
+            plannedvms = {}
+            threaded = overrides.get('threaded', self.threaded)
+            maxthreads = overrides.get('maxthreads', self.maxthreads)
             baseplans = []
             vmnames = [name for name in vmentries]
             if basefile is not None:
@@ -1874,31 +2182,34 @@ class Kconfig(Kbaseconfig):
                         self.handle_host(pool=self.pool, image=imageprofile, download=True, update_profile=True)
                         profile['image'] = os.path.basename(IMAGES[imageprofile])
                         currentoverrides['image'] = profile['image']
-                result = self.create_vm(name, profilename, overrides=currentoverrides, customprofile=profile, k=z,
-                                        plan=plan, basedir=currentplandir, client=vmclient, onfly=onfly,
-                                        onlyassets=onlyassets)
-                if not onlyassets:
-                    common.handle_response(result, name, client=vmclient)
+                vmdata = {'profilename': profilename, 'profile': profile, 'overrides': currentoverrides, 'k': z,
+                          'plan': plan, 'basedir': currentplandir, 'client': vmclient, 'onfly': onfly,
+                          'onlyassets': onlyassets}
+                plannedvms[name] = vmdata
+                if threaded and not onlyassets:
+                    threadedvms[name] = vmdata
+                    continue
+                result = self.deploy_plan_vm(name, vmdata)
+                vmresults.append((name, profile, result))
+            if threadedvms:
+                pprint("Deploying %s vms using up to %s threads" % (len(threadedvms), maxthreads))
+                vmresults.extend(self.deploy_plan_vms(threadedvms, maxthreads=maxthreads))
+            for name, profile, result in vmresults:
                 if result['result'] == 'success':
                     newvms.append(name)
                     start = profile.get('start', True)
                     cloudinit = profile.get('cloudinit', True)
-                    wait = profile.get('wait', False)
                     asyncwait = profile.get('asyncwait', False)
                     finishfiles = profile.get('finishfiles', [])
                     if onlyassets:
                         newassets.append(result['data'])
-                    elif not wait and not asyncwait:
-                        continue
-                    elif not start or not cloudinit or profile.get('image') is None:
-                        pprint("Skipping wait on %s" % name)
-                    elif asyncwait:
-                        asyncwaitvm = {'name': name, 'finishfiles': finishfiles}
+                    elif asyncwait and start and cloudinit and profile.get('image') is not None:
+                        vmdata = plannedvms[name]
+                        resultclient = result.get('client', vmdata['client'])
+                        resultk = vmdata['k'] if resultclient == vmdata['client'] else self.client_k(resultclient)
+                        asyncwaitvm = {'name': name, 'finishfiles': finishfiles, 'client': resultclient,
+                                       'k': resultk}
                         asyncwaitvms.append(asyncwaitvm)
-                    else:
-                        self.wait(name)
-                        if finishfiles:
-                            self.handle_finishfiles(name, finishfiles)
                 else:
                     failedvms.append(name)
         if diskentries and not onlyassets:
@@ -2013,7 +2324,7 @@ class Kconfig(Kbaseconfig):
             else:
                 pprint("Creating ansible inventory for plan %s in %s" % (plan, inventoryfile))
                 vms = []
-                for vm in sorted(k.list(), key=lambda x: x['name']):
+                for vm in sorted(k.list(filters={'plan': plan}), key=lambda x: x['name']):
                     name = vm['name']
                     description = vm['plan']
                     if description == plan:
@@ -2053,11 +2364,12 @@ class Kconfig(Kbaseconfig):
             rmtree(path)
         if inputstring is not None and os.path.exists("temp_plan_%s.yml" % plan):
             os.remove("temp_plan_%s.yml" % plan)
-        for entry in asyncwaitvms:
-            name, finishfiles = entry['name'], entry['finishfiles']
-            self.wait(name)
-            if finishfiles:
-                self.handle_finishfiles(self, name, finishfiles)
+        if asyncwaitvms:
+            waittimeout = overrides.get('waittimeout', self.waittimeout)
+            timedoutvms = self.wait_vms(asyncwaitvms, timeout=waittimeout, threaded=threaded, maxthreads=maxthreads)
+            if timedoutvms:
+                returndata['result'] = 'failure'
+                returndata['reason'] = 'The following vm timed out: %s' % ','.join(timedoutvms)
         post_script = '%s/kcli_post.sh' % inputdir
         if os.path.exists(post_script):
             if post:
@@ -2256,26 +2568,29 @@ class Kconfig(Kbaseconfig):
         else:
             return k.list_loadbalancers()
 
-    def wait(self, name, image=None, quiet=False):
-        k = self.k
+    def wait(self, name, image=None, quiet=False, timeout=0, k=None, client=None):
+        """Wait for a vm to finish its customisation, streaming its boot log over a single ssh session"""
+        k = k if k is not None else self.k
+        settings = self.client_settings(client)
         if image is None:
             image = k.info(name)['image']
         pprint("Waiting for vm %s to finish customisation" % name)
         if 'cos' in image:
-            cmd = 'journalctl --identifier=ignition --all --no-pager'
+            cmd = 'journalctl --identifier=ignition --all --no-pager --follow'
         else:
             cloudinitfile = common.get_cloudinitfile(image)
-            cmd = "sudo tail -n 50 %s" % cloudinitfile
+            cmd = "sudo tail -n 50 -F %s" % cloudinitfile
+        deadline = time() + timeout if timeout > 0 else None
         user, ip, vmport = None, None, None
         hostip = None
         while ip is None:
             info = k.info(name)
-            if self.type == 'packet' and info.get('status') != 'active':
+            if settings['type'] == 'packet' and info.get('status') != 'active':
                 warning("Waiting for node to be active")
                 ip = None
             else:
                 user, ip = info.get('user'), info.get('ip')
-                if self.type == 'kubevirt':
+                if settings['type'] == 'kubevirt':
                     if k.access_mode == 'NodePort':
                         vmport = info.get('nodeport')
                         if hostip is None:
@@ -2284,33 +2599,54 @@ class Kconfig(Kbaseconfig):
                     elif k.access_mode == 'LoadBalancer':
                         ip = info.get('loadbalancerip')
                 if user is not None and ip is not None:
-                    if self.type == 'openstack' and info.get('privateip') == ip and self.k.external_network is not None\
-                            and info.get('nets')[0]['net'] != self.k.external_network:
+                    if settings['type'] == 'openstack' and info.get('privateip') == ip and\
+                            k.external_network is not None\
+                            and info.get('nets')[0]['net'] != k.external_network:
                         warning("Waiting for floating ip instead of a private ip...")
                         ip = None
                     else:
-                        testcmd = common.ssh(name, user=user, ip=ip, tunnel=self.tunnel, tunnelhost=self.tunnelhost,
-                                             tunnelport=self.tunnelport, tunneluser=self.tunneluser,
-                                             insecure=self.insecure, cmd='id -un', vmport=vmport)
+                        testcmd = common.ssh(name, user=user, ip=ip, tunnel=settings['tunnel'],
+                                             tunnelhost=settings['tunnelhost'], tunnelport=settings['tunnelport'],
+                                             tunneluser=settings['tunneluser'], insecure=settings['insecure'],
+                                             cmd='id -un', vmport=vmport)
                         if os.popen(testcmd).read().strip() != user:
                             warning("Gathered ip not functional yet...")
                             ip = None
-            pprint("Waiting for vm to be accessible...")
-            sleep(5)
-        sleep(5)
-        oldoutput = ''
+            if ip is None:
+                if deadline is not None and time() > deadline:
+                    error("Timeout waiting for vm %s to be accessible" % name)
+                    return False
+                pprint("Waiting for vm %s to be accessible..." % name)
+                if hasattr(k, 'watch_vm'):
+                    k.watch_vm(name, timeout=5)
+                else:
+                    sleep(5)
+        sshcmd = common.ssh(name, user=user, ip=ip, tunnel=settings['tunnel'], tunnelhost=settings['tunnelhost'],
+                            tunnelport=settings['tunnelport'], tunneluser=settings['tunneluser'],
+                            insecure=settings['insecure'], cmd=cmd, vmport=vmport)
         while True:
-            sshcmd = common.ssh(name, user=user, ip=ip, tunnel=self.tunnel, tunnelhost=self.tunnelhost, vmport=vmport,
-                                tunnelport=self.tunnelport, tunneluser=self.tunneluser, insecure=self.insecure, cmd=cmd)
-            output = os.popen(sshcmd).read()
-            if 'kcli boot finished' in output:
-                break
-            output = output.replace(oldoutput, '')
-            if not quiet:
-                print(output)
-            oldoutput = output
+            finished = False
+            proc = Popen(sshcmd, shell=True, stdout=PIPE, stderr=DEVNULL, universal_newlines=True)
+            timer = Timer(deadline - time(), proc.terminate) if deadline is not None else None
+            if timer is not None:
+                timer.start()
+            for line in proc.stdout:
+                if 'kcli boot finished' in line:
+                    finished = True
+                    break
+                if not quiet:
+                    print(line.rstrip())
+            if timer is not None:
+                timer.cancel()
+            proc.terminate()
+            proc.wait()
+            if finished:
+                return True
+            elif deadline is not None and time() > deadline:
+                error("Timeout waiting for vm %s to finish customisation" % name)
+                return False
+            # the session got closed, for instance because the vm rebooted during its customisation
             sleep(2)
-        return True
 
     def create_kube_generic(self, cluster, overrides={}):
         if os.path.exists('/i_am_a_container'):
@@ -2360,7 +2696,7 @@ class Kconfig(Kbaseconfig):
             rmtree(clusterdir)
             if ipi:
                 return
-        for vm in sorted(k.list(), key=lambda x: x['name']):
+        for vm in sorted(k.list(filters={'kube': cluster}), key=lambda x: x['name']):
             name = vm['name']
             if 'domain' in vm:
                 domain = vm['domain'].replace('.', '-')
@@ -2368,6 +2704,7 @@ class Kconfig(Kbaseconfig):
             if currentcluster is not None and currentcluster == cluster:
                 k.delete(name, snapshots=True)
                 common.set_lastvm(name, self.client, delete=True)
+                self.update_cache(self.client, name, delete=True)
                 success("%s deleted on %s!" % (name, self.client))
         if self.type == 'kubevirt' and self.k.access_mode == 'LoadBalancer':
             try:
@@ -2418,12 +2755,13 @@ class Kconfig(Kbaseconfig):
             pprint("Updating vms with %s role" % role)
             plandata = self.plan(plan, inputfile='%s/%s.yml' % (plandir, role), overrides=overrides, update=True)
             planvms.extend(plandata['newvms'] + plandata['existingvms'])
-        for vm in self.k.list():
+        for vm in self.k.list(filters={'plan': plan}):
             vmname = vm['name']
             vmplan = vm.get('plan', 'kvirt')
             if vmplan == plan and vmname not in planvms:
                 pprint("Deleting vm %s" % vmname)
                 self.k.delete(vmname)
+                self.update_cache(self.client, vmname, delete=True)
 
     def expose_plan(self, plan, inputfile=None, overrides={}, port=9000, extraconfigs={}, installermode=False):
         inputfile = os.path.expanduser(inputfile)
@@ -2597,8 +2935,10 @@ class Kconfig(Kbaseconfig):
             auths = {'auths': {disconnected_url: {'auth': key, 'email': 'jhendrix@karmalabs.com'}}}
             data['pull_secret'] = json.dumps(auths)
 
-    def handle_finishfiles(self, name, finishfiles):
-        current_ip = common._ssh_credentials(self.k, name)[1]
+    def handle_finishfiles(self, name, finishfiles, k=None, client=None):
+        k = k if k is not None else self.k
+        settings = self.client_settings(client)
+        current_ip = common._ssh_credentials(k, name)[1]
         for finishfile in finishfiles:
             if isinstance(finishfile, str):
                 destination = '.'
@@ -2609,8 +2949,9 @@ class Kconfig(Kbaseconfig):
                 warning("Incorrect finishfile entry %s. Skipping" % finishfile)
                 continue
             scpcmd = common.scp(name, ip=current_ip, user='root', source=source, destination=destination,
-                                tunnel=self.tunnel, tunnelhost=self.tunnelhost, tunnelport=self.tunnelport,
-                                tunneluser=self.tunneluser, download=True, insecure=True)
+                                tunnel=settings['tunnel'], tunnelhost=settings['tunnelhost'],
+                                tunnelport=settings['tunnelport'], tunneluser=settings['tunneluser'], download=True,
+                                insecure=True)
             os.system(scpcmd)
 
     def handle_notifications(self, name, notifymethods=[], pushbullettoken=None, notifyscript=None, notifycmd=None,
@@ -203,5 +203,11 @@ ZEROTIER_KUBELET = False
 METADATA_FIELDS = ['dnsclient', 'domain', 'image', 'kube', 'kubetype', 'loadbalancer', 'owner', 'plan', 'profile']
 VMRULES = []
 CACHE = False
+CACHETTL = 300
+THREADED = False
+MAXTHREADS = 10
+WAITTIMEOUT = 0
 SECURITYGROUPS = []
+IMAGECACHE = False
+IMAGECACHESIZE = 50
 LOCAL_OPENSHIFT_APPS = ['argocd', 'istio', 'users']
@@ -57,7 +57,7 @@ class Kexposer():
                         except:
                             pass
                     else:
-                        for vm in currentk.list():
+                        for vm in currentk.list(filters={'plan': plan_name}):
                             if vm['plan'] == plan_name:
                                 current_data['vms'].append(vm)
                                 if 'creationdate' not in current_data and 'creationdate' in vm:
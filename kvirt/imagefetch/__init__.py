@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+streaming download of images, decompressed on the fly with range resume and checksum verification,
+backed by a content addressed cache. only relies on the standard library so that it can also be piped
+to a remote python interpreter
+"""
+
+import argparse
+import bz2
+from concurrent.futures import ThreadPoolExecutor
+import errno
+import fcntl
+import hashlib
+import json
+import lzma
+import os
+import shutil
+import sys
+from time import sleep, time
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+import zlib
+
+CHUNKSIZE = 8 * 1024 * 1024
+READSIZE = 1024 * 1024
+MAXTHREADS = 4
+RETRIES = 5
+SUMSFILES = ['sha256sum.txt', 'SHA256SUMS', 'CHECKSUM']
+COMPRESSIONS = ['xz', 'gz', 'bz2']
+CACHEDIR = '~/.kcli/imagecache'
+CACHESIZE = 50
+CACHETTL = 7
+FICLONE = 0x40049409
+
+
+def link(source, destination, hardlink=False):
+    """Populate destination with the content of source, using a reflink or, if allowed, a hardlink when possible"""
+    tmpdestination = "%s.tmp" % destination
+    if os.path.exists(tmpdestination):
+        os.remove(tmpdestination)
+    try:
+        with open(source, 'rb') as src, open(tmpdestination, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except (OSError, IOError):
+        if os.path.exists(tmpdestination):
+            os.remove(tmpdestination)
+        try:
+            if not hardlink:
+                raise OSError(errno.EPERM, "Hardlinks disabled")
+            os.link(source, tmpdestination)
+        except OSError as e:
+            if e.errno not in [errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP]:
+                raise
+            shutil.copyfile(source, tmpdestination)
+    os.replace(tmpdestination, destination)
+
+
+class ImageCache(object):
+    """
+    Content addressed store of images, indexed by url and evicted in lru order when exceeding its size in gb.
+    Entries are revalidated against the published checksum of their url when there's one, and expire after ttl days
+    otherwise. Hardlinks are only used when asked for, as the cached copy would then follow changes to the image
+    """
+    def __init__(self, cachedir=CACHEDIR, size=CACHESIZE, ttl=CACHETTL, hardlink=False):
+        self.cachedir = os.path.expanduser(cachedir)
+        self.hardlink = hardlink
+        self.objectsdir = "%s/objects" % self.cachedir
+        self.indexfile = "%s/index.json" % self.cachedir
+        self.size = size * 1024 * 1024 * 1024
+        self.ttl = ttl * 24 * 3600
+        os.makedirs(self.objectsdir, exist_ok=True)
+
+    def _update(self, func):
+        with open("%s/index.lock" % self.cachedir, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.indexfile) as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {'urls': {}, 'objects': {}}
+            result = func(index)
+            with open("%s.tmp" % self.indexfile, 'w') as f:
+                json.dump(index, f)
+            os.replace("%s.tmp" % self.indexfile, self.indexfile)
+            return result
+
+    def lookup(self, url, checksum=None):
+        """Return the path of the cached object for url, if any and still current"""
+        def _lookup(index):
+            entry = index['urls'].get(url)
+            if not isinstance(entry, dict):
+                return None
+            digest = entry['digest']
+            path = "%s/%s" % (self.objectsdir, digest)
+            if not os.path.exists(path) or digest not in index['objects']:
+                return None
+            if checksum is not None and entry.get('checksum') != checksum.lower():
+                return None
+            if checksum is None and time() - entry.get('fetched', 0) > self.ttl:
+                return None
+            index['objects'][digest]['used'] = time()
+            return path
+        return self._update(_lookup)
+
+    def add(self, url, path, digest, checksum=None):
+        """Store path as object digest for url, then evict least recently used objects above the size budget"""
+        objectpath = "%s/%s" % (self.objectsdir, digest)
+        if not os.path.exists(objectpath):
+            link(path, objectpath, hardlink=self.hardlink)
+
+        def _add(index):
+            index['urls'][url] = {'digest': digest, 'checksum': checksum.lower() if checksum is not None else None,
+                                  'fetched': time()}
+            index['objects'][digest] = {'size': os.path.getsize(objectpath), 'used': time()}
+            total = sum(entry['size'] for entry in index['objects'].values())
+            for olddigest in sorted(index['objects'], key=lambda x: index['objects'][x]['used']):
+                if total <= self.size or olddigest == digest:
+                    continue
+                total -= index['objects'][olddigest]['size']
+                del index['objects'][olddigest]
+                index['urls'] = {u: e for u, e in index['urls'].items()
+                                 if isinstance(e, dict) and e['digest'] != olddigest}
+                if os.path.exists("%s/%s" % (self.objectsdir, olddigest)):
+                    os.remove("%s/%s" % (self.objectsdir, olddigest))
+        self._update(_add)
+
+
+class Decompressor(object):
+    """
+    Decompress data as it gets fed, handling files made of several concatenated streams
+    """
+    def __init__(self, compression):
+        self.compression = compression
+        self.decompressor = self._new()
+
+    def _new(self):
+        if self.compression == 'xz':
+            return lzma.LZMADecompressor()
+        elif self.compression == 'gz':
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.compression == 'bz2':
+            return bz2.BZ2Decompressor()
+        return None
+
+    def decompress(self, data):
+        if self.decompressor is None:
+            return data
+        result = []
+        while data:
+            result.append(self.decompressor.decompress(data))
+            data = self.decompressor.unused_data if self.decompressor.eof else b''
+            if data:
+                self.decompressor = self._new()
+        return b''.join(result)
+
+
+def get_compression(url):
+    """
+
+    :param url:
+    :return:
+    """
+    extension = os.path.basename(url).split('?')[0].split('.')[-1]
+    return extension if extension in COMPRESSIONS else None
+
+
+def get_checksum(url):
+    """Look for the sha256 of url in the sums files published along with it"""
+    basename = os.path.basename(url).split('?')[0]
+    baseurl = os.path.dirname(url.split('?')[0])
+    for sumsfile in SUMSFILES:
+        try:
+            sums = urlopen("%s/%s" % (baseurl, sumsfile), timeout=30).read().decode('utf-8', errors='ignore')
+        except (HTTPError, URLError, OSError):
+            continue
+        for line in sums.splitlines():
+            line = line.strip()
+            # coreutils format: <sum> [*]<file>, bsd format: SHA256 (<file>) = <sum>
+            if line.startswith('SHA256 (%s) = ' % basename):
+                return line.split(' = ')[-1]
+            entries = line.split()
+            if len(entries) == 2 and len(entries[0]) == 64 and entries[1].lstrip('*') == basename:
+                return entries[0]
+    return None
+
+
+def _open(url, start=0, end=None):
+    headers = {}
+    if start > 0 or end is not None:
+        headers['Range'] = "bytes=%s-%s" % (start, end if end is not None else '')
+    return urlopen(Request(url, headers=headers), timeout=60)
+
+
+def _fetch_chunk(url, start, end):
+    for attempt in range(RETRIES):
+        try:
+            response = _open(url, start, end)
+            if response.status != 206:
+                raise IOError("Server ignored range request")
+            data = response.read()
+            if len(data) == end - start + 1:
+                return data
+        except (HTTPError, URLError, OSError):
+            if attempt == RETRIES - 1:
+                raise
+        sleep(2 ** attempt)
+    raise IOError("Couldn't retrieve bytes %s-%s of %s" % (start, end, url))
+
+
+def _sequential(url, response, offset=0, resumable=False):
+    while True:
+        try:
+            while True:
+                data = response.read(READSIZE)
+                if not data:
+                    return
+                offset += len(data)
+                yield data
+        except (URLError, OSError) as e:
+            if not resumable:
+                raise
+            error = e
+        for attempt in range(RETRIES):
+            sleep(2 ** attempt)
+            try:
+                response = _open(url, offset)
+                if response.status == 206:
+                    break
+            except (HTTPError, URLError, OSError) as e:
+                error = e
+        else:
+            raise error
+
+
+def _parallel(url, size, offset=0, threads=MAXTHREADS):
+    chunks = [(start, min(start + CHUNKSIZE, size) - 1) for start in range(offset, size, CHUNKSIZE)]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        # keep a bounded window of chunks in flight, consumed in order
+        futures = [executor.submit(_fetch_chunk, url, start, end) for start, end in chunks[:threads * 2]]
+        for index in range(len(chunks)):
+            data = futures[index].result()
+            futures[index] = None
+            nextindex = index + threads * 2
+            if nextindex < len(chunks):
+                futures.append(executor.submit(_fetch_chunk, url, *chunks[nextindex]))
+            yield data
+
+
+def fetch_image(url, path, compression=None, checksum=None, threads=MAXTHREADS, quiet=False, cache=None):
+    """Download url into path, decompressing while downloading so that the image is written once"""
+    compression = compression if compression is not None else get_compression(url)
+    checksum = checksum if checksum is not None else get_checksum(url)
+    if cache is not None:
+        cachedpath = cache.lookup(url, checksum=checksum)
+        if cachedpath is not None:
+            if not quiet:
+                print("Using cached image for %s" % url)
+            link(cachedpath, path, hardlink=cache.hardlink)
+            return {'result': 'success'}
+    if checksum is None and not quiet:
+        print("No published sha256 found for %s. Skipping verification" % url)
+    partpath = "%s.part" % path
+    sha256 = hashlib.sha256()
+    offset = 0
+    # only plain downloads can be resumed across runs, as decompression state can't be recovered
+    if compression is None and os.path.exists(partpath):
+        with open(partpath, 'rb') as f:
+            for data in iter(lambda: f.read(READSIZE), b''):
+                sha256.update(data)
+                offset += len(data)
+    try:
+        response = _open(url, offset)
+    except HTTPError as e:
+        if e.code != 416:
+            return {'result': 'failure', 'reason': "Unable to download %s. %s" % (url, e)}
+        response = _open(url)
+        offset = 0
+        sha256 = hashlib.sha256()
+    if offset > 0 and response.status != 206:
+        offset = 0
+        sha256 = hashlib.sha256()
+    resumable = response.headers.get('Accept-Ranges') == 'bytes' or response.status == 206
+    length = response.headers.get('Content-Length')
+    size = offset + int(length) if length is not None else None
+    if resumable and size is not None and threads > 1 and size - offset > 2 * CHUNKSIZE:
+        response.close()
+        stream = _parallel(url, size, offset=offset, threads=threads)
+    else:
+        stream = _sequential(url, response, offset=offset, resumable=resumable)
+    decompressor = Decompressor(compression)
+    content = hashlib.sha256() if compression is not None else sha256
+    downloaded = offset
+    progress = -1
+    with open(partpath, 'ab' if offset > 0 else 'wb') as f:
+        for data in stream:
+            sha256.update(data)
+            downloaded += len(data)
+            if compression is not None:
+                data = decompressor.decompress(data)
+                content.update(data)
+            f.write(data)
+            if not quiet and size and sys.stdout.isatty() and downloaded * 100 // size != progress:
+                progress = downloaded * 100 // size
+                print("\r%s%%" % progress, end='', flush=True)
+    if not quiet and size and sys.stdout.isatty():
+        print()
+    if size is not None and downloaded != size:
+        return {'result': 'failure', 'reason': "Incomplete download of %s" % url}
+    if checksum is not None and sha256.hexdigest() != checksum.lower():
+        os.remove(partpath)
+        return {'result': 'failure', 'reason': "Checksum mismatch for %s" % url}
+    os.replace(partpath, path)
+    if cache is not None:
+        cache.add(url, path, content.hexdigest(), checksum=checksum)
+    return {'result': 'success'}
+
+
+def main(argv=None):
+    """Fetch an image, returning curl like exit codes"""
+    parser = argparse.ArgumentParser(description='Stream an image into a path, decompressing it on the fly')
+    parser.add_argument('-c', '--compression', choices=COMPRESSIONS)
+    parser.add_argument('-s', '--checksum', help='Expected sha256. Looked up in published sums files by default')
+    parser.add_argument('-t', '--threads', type=int, default=MAXTHREADS)
+    parser.add_argument('--cache', action='store_true', help='Keep images in a local cache and reuse them')
+    parser.add_argument('--cachedir', default=CACHEDIR)
+    parser.add_argument('--cachesize', help='Size of the cache in gb', type=int, default=CACHESIZE)
+    parser.add_argument('--cachettl', help='Days after which images without published checksum are fetched again',
+                        type=int, default=CACHETTL)
+    parser.add_argument('--hardlink', action='store_true', help='Hardlink cached images when they can\'t be reflinked')
+    parser.add_argument('url')
+    parser.add_argument('path')
+    args = parser.parse_args(argv)
+    try:
+        cache = ImageCache(args.cachedir, args.cachesize, ttl=args.cachettl, hardlink=args.hardlink) if args.cache\
+            else None
+        result = fetch_image(args.url, args.path, compression=args.compression, checksum=args.checksum,
+                             threads=args.threads, cache=cache)
+    except PermissionError as e:
+        print(e)
+        return 23
+    except (HTTPError, URLError, OSError, EOFError, lzma.LZMAError, zlib.error) as e:
+        print(e)
+        return 1
+    if result['result'] != 'success':
+        print(result['reason'])
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
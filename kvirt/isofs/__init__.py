@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+in memory creation of small iso9660 images with joliet extensions, as used for cloudinit seeds
+"""
+
+import re
+import struct
+from time import gmtime
+
+SECTOR = 2048
+SYSTEMAREA = 16
+JOLIETMAX = 64
+
+
+def _both16(value):
+    return struct.pack('<H', value) + struct.pack('>H', value)
+
+
+def _both32(value):
+    return struct.pack('<I', value) + struct.pack('>I', value)
+
+
+def _sectors(size):
+    return (size + SECTOR - 1) // SECTOR
+
+
+def _pad(data, size, fill=b' '):
+    data = data[:size] + fill * ((size - len(data[:size])) // len(fill))
+    return data + b'\x00' * (size - len(data))
+
+
+def _primary_name(name, directory=False):
+    name = name.upper()
+    if directory:
+        return re.sub('[^A-Z0-9_]', '_', name)[:8].encode()
+    base, _, extension = name.rpartition('.') if '.' in name else (name, '', '')
+    base = re.sub('[^A-Z0-9_]', '_', base)[:8]
+    extension = re.sub('[^A-Z0-9_]', '_', extension)[:3]
+    return ("%s.%s;1" % (base, extension)).encode()
+
+
+def _joliet_name(name, directory=False):
+    identifier = name if directory else "%s;1" % name
+    if len(identifier) > JOLIETMAX:
+        raise ValueError("Name %s too long for joliet, which allows %s characters" % (name, JOLIETMAX))
+    return identifier.encode('utf-16-be')
+
+
+class Directory(object):
+    """
+    Node of the tree, holding entries as name to Directory or to file index
+    """
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.entries = {}
+        self.extent = {}
+        self.size = {}
+        self.number = 0
+
+
+class IsoFs(object):
+    """
+    Image made of files given as a dict of paths to content, whose directories get created as needed.
+    File data is shared between the primary and joliet trees so the image only contains it once
+    """
+    def __init__(self, files, volid='cidata'):
+        self.volid = volid
+        self.root = Directory('')
+        self.files = []
+        for path in sorted(files):
+            data = files[path].encode() if isinstance(files[path], str) else files[path]
+            directory = self.root
+            components = path.strip('/').split('/')
+            for component in components[:-1]:
+                if component not in directory.entries:
+                    directory.entries[component] = Directory(component, parent=directory)
+                directory = directory.entries[component]
+            directory.entries[components[-1]] = len(self.files)
+            self.files.append({'data': data, 'extent': 0})
+        self.directories = []
+        pending = [self.root]
+        while pending:
+            directory = pending.pop(0)
+            self.directories.append(directory)
+            directory.number = len(self.directories)
+            pending.extend(directory.entries[name] for name in sorted(directory.entries)
+                           if isinstance(directory.entries[name], Directory))
+        self.date = self._date()
+        self._layout()
+
+    def _date(self):
+        now = gmtime()
+        return bytes([now.tm_year - 1900, now.tm_mon, now.tm_mday, now.tm_hour, now.tm_min, now.tm_sec, 0])
+
+    def _voldate(self):
+        now = gmtime()
+        return ("%04d%02d%02d%02d%02d%02d00" % now[:6]).encode() + b'\x00'
+
+    def _name(self, tree, name, directory=False):
+        return _primary_name(name, directory) if tree == 'primary' else _joliet_name(name, directory)
+
+    def _record(self, extent, size, identifier, directory=False):
+        length = 33 + len(identifier) + (1 - len(identifier) % 2)
+        record = bytes([length, 0]) + _both32(extent) + _both32(size) + self.date
+        record += bytes([2 if directory else 0, 0, 0]) + _both16(1) + bytes([len(identifier)]) + identifier
+        return _pad(record, length, b'\x00')
+
+    def _records(self, tree, directory):
+        parent = directory.parent if directory.parent is not None else directory
+        records = [self._record(directory.extent.get(tree, 0), directory.size.get(tree, SECTOR), b'\x00', True),
+                   self._record(parent.extent.get(tree, 0), parent.size.get(tree, SECTOR), b'\x01', True)]
+        entries = []
+        for name, entry in directory.entries.items():
+            if isinstance(entry, Directory):
+                identifier = self._name(tree, name, directory=True)
+                entries.append((identifier, entry.extent.get(tree, 0), entry.size.get(tree, SECTOR), True))
+            else:
+                identifier = self._name(tree, name)
+                fileinfo = self.files[entry]
+                entries.append((identifier, fileinfo['extent'], len(fileinfo['data']), False))
+        for identifier, extent, size, isdir in sorted(entries):
+            records.append(self._record(extent, size, identifier, isdir))
+        return records
+
+    def _directory(self, tree, directory):
+        data = b''
+        for record in self._records(tree, directory):
+            # records can't span sectors
+            if len(data) // SECTOR != (len(data) + len(record) - 1) // SECTOR:
+                data = _pad(data, _sectors(len(data)) * SECTOR, b'\x00')
+            data += record
+        return _pad(data, _sectors(len(data)) * SECTOR, b'\x00')
+
+    def _pathtable(self, tree, littleendian=True):
+        pack = '<' if littleendian else '>'
+        data = b''
+        for directory in self.directories:
+            identifier = self._name(tree, directory.name, directory=True) if directory.parent is not None else b'\x00'
+            parent = directory.parent.number if directory.parent is not None else 1
+            data += bytes([len(identifier), 0]) + struct.pack(pack + 'IH', directory.extent[tree], parent)
+            data += identifier + b'\x00' * (len(identifier) % 2)
+        return data
+
+    def _layout(self):
+        # directory sizes only depend on names, so a first pass with empty extents is enough to size them
+        for tree in ['primary', 'joliet']:
+            for directory in self.directories:
+                directory.extent[tree] = 0
+                directory.size[tree] = len(self._directory(tree, directory))
+        self.pathtablesize = {tree: len(self._pathtable(tree)) for tree in ['primary', 'joliet']}
+        position = SYSTEMAREA + 3
+        self.pathtables = {}
+        for tree in ['primary', 'joliet']:
+            self.pathtables[tree] = (position, position + _sectors(self.pathtablesize[tree]))
+            position += 2 * _sectors(self.pathtablesize[tree])
+        for tree in ['primary', 'joliet']:
+            for directory in self.directories:
+                directory.extent[tree] = position
+                position += directory.size[tree] // SECTOR
+        for fileinfo in self.files:
+            fileinfo['extent'] = position
+            position += _sectors(len(fileinfo['data']))
+        self.sectors = position
+
+    def _descriptor(self, tree):
+        joliet = tree == 'joliet'
+        text = (lambda x, size: _pad(x.encode('utf-16-be'), size, b'\x00 ')) if joliet else\
+            (lambda x, size: _pad(x.encode(), size))
+        root = self.root
+        lpath, mpath = self.pathtables[tree]
+        data = bytes([2 if joliet else 1]) + b'CD001' + bytes([1, 0])
+        data += text('', 32) + text(self.volid, 32) + b'\x00' * 8 + _both32(self.sectors)
+        data += _pad(b'%/E', 32, b'\x00') if joliet else b'\x00' * 32
+        data += _both16(1) + _both16(1) + _both16(SECTOR) + _both32(self.pathtablesize[tree])
+        data += struct.pack('<II', lpath, 0) + struct.pack('>II', mpath, 0)
+        data += self._record(root.extent[tree], root.size[tree], b'\x00', True)
+        data += text('', 128) + text('', 128) + text('', 128) + text('KCLI', 128)
+        data += text('', 37) + text('', 37) + text('', 37)
+        data += self._voldate() * 2 + b'0' * 16 + b'\x00' + self._voldate() + bytes([1, 0])
+        return _pad(data, SECTOR, b'\x00')
+
+    def chunks(self):
+        """Yield the content of the image, sector aligned"""
+        yield b'\x00' * SYSTEMAREA * SECTOR
+        terminator = _pad(bytes([255]) + b'CD001' + bytes([1]), SECTOR, b'\x00')
+        yield self._descriptor('primary') + self._descriptor('joliet') + terminator
+        for tree in ['primary', 'joliet']:
+            size = _sectors(self.pathtablesize[tree]) * SECTOR
+            yield _pad(self._pathtable(tree), size, b'\x00') + _pad(self._pathtable(tree, False), size, b'\x00')
+        for tree in ['primary', 'joliet']:
+            for directory in self.directories:
+                yield self._directory(tree, directory)
+        for fileinfo in self.files:
+            yield _pad(fileinfo['data'], _sectors(len(fileinfo['data'])) * SECTOR, b'\x00')
+
+    def getvalue(self):
+        return b''.join(self.chunks())
+
+
+def make_iso(files, volid='cidata'):
+    """
+    Return the content of an iso holding files
+
+    :param files:
+    :param volid:
+    :return:
+    """
+    return IsoFs(files, volid=volid).getvalue()
@@ -2,7 +2,7 @@
 # coding=utf-8
 
 from kvirt.config import Kconfig
-from kvirt.common import get_user
+from kvirt.common import get_user, get_cache, set_cache
 import json
 import sys
 import argparse
@@ -30,6 +30,9 @@ class KcliInventory(object):
         self.tunnel = config.tunnel
         self.k = config.k
         self.type = config.type
+        self.client = config.client
+        self.cache = config.cache
+        self.cachettl = config.cachettl
         if self.k.conn is None:
             sys.exit(1)
 
@@ -63,7 +66,12 @@ class KcliInventory(object):
         tunnel = self.tunnel
         metadata = {'_meta': {'hostvars': {}}}
         hostvalues = metadata['_meta']['hostvars']
-        for vm in k.list():
+        _list = get_cache(self.client, ttl=self.cachettl) if self.cache else None
+        if _list is None:
+            _list = k.list()
+            if self.cache:
+                set_cache(self.client, _list)
+        for vm in _list:
             name = vm.get('name')
             status = vm.get('status')
             ip = vm.get('ip', '')
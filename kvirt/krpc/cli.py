@@ -19,8 +19,10 @@ from kvirt import version
 from prettytable import PrettyTable
 import argcomplete
 import argparse
+from datetime import datetime
 from kvirt.krpc import commoncli as common
 from kvirt.krpc.commoncli import pprint, error, success
+from kvirt.common import stream_table
 from kvirt import nameutils
 import os
 import random
@@ -454,9 +456,25 @@ def sync_host(args):
         sys.exit(1)
 
 
+def watch_vm(args):
+    """Watch vms, printing their changes as they happen"""
+    filters = args.filters
+    config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
+    events = ([datetime.now().strftime("%H:%M:%S"), e.event, e.vm.name, e.vm.status, e.vm.ip, e.vm.image, e.vm.plan,
+               e.vm.profile] for e in config.k.watch_list(kcli_pb2.client(client=config.client))
+              if not filters or e.vm.status == filters)
+    try:
+        stream_table(["Time", "Event", "Name", "Status", "Ips", "Source", "Plan", "Profile"], events,
+                     widths=[8, 7, 20, 6, 15, 20, 10, 10])
+    except KeyboardInterrupt:
+        return
+
+
 def list_vm(args):
     """List vms"""
     filters = args.filters
+    if args.watch:
+        return watch_vm(args)
     config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
     if config.client != 'all':
         k = config.k
@@ -480,21 +498,10 @@ def list_vm(args):
                     vms.add_row(vminfo)
         print(vms)
     else:
-        vms = PrettyTable(["Name", "Status", "Ips", "Source", "Plan", "Profile"])
-        for vm in k.list(empty()).vms:
-            name = vm.name
-            status = vm.status
-            ip = vm.ip
-            source = vm.image
-            plan = vm.plan
-            profile = vm.profile
-            vminfo = [name, status, ip, source, plan, profile]
-            if filters:
-                if status == filters:
-                    vms.add_row(vminfo)
-            else:
-                vms.add_row(vminfo)
-        print(vms)
+        vms = ([vm.name, vm.status, vm.ip, vm.image, vm.plan, vm.profile]
+               for vm in k.stream_list(kcli_pb2.client(client=config.client))
+               if not filters or vm.status == filters)
+        stream_table(["Name", "Status", "Ips", "Source", "Plan", "Profile"], vms, widths=[20, 6, 15, 20, 10, 10])
     return
 
 
@@ -666,11 +673,8 @@ def list_image(args):
     config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
     if config.client != 'all':
         k = config.k
-    imagestable = PrettyTable(["Images"])
-    imagestable.align["Images"] = "l"
-    for image in k.list_images(empty()).images:
-        imagestable.add_row([image])
-    print(imagestable)
+    images = ([image.image] for image in k.stream_list_images(empty()))
+    stream_table(["Images"], images, widths=[60])
     return
 
 
@@ -695,25 +699,15 @@ def list_network(args):
     if config.client != 'all':
         k = config.k
     if not subnets:
-        networks = k.list_networks(empty())
+        networks = k.stream_list_networks(empty())
         pprint("Listing Networks...")
         if short:
-            networkstable = PrettyTable(["Network"])
-            networkslist = []
-            for network in networks.networks:
-                networkslist.append([network.network])
-            for network in sorted(networkslist):
-                networkstable.add_row(network)
+            stream_table(["Network"], ([network.network] for network in networks))
         else:
-            networkstable = PrettyTable(["Network", "Type", "Cidr", "Dhcp", "Domain", "Mode"])
-            networkslist = []
-            for network in networks.networks:
-                domain = network.domain if network.domain != '' else 'N/A'
-                networkslist.append([network.network, network.type, network.cidr, network.dhcp, domain, network.mode])
-            for network in sorted(networkslist):
-                networkstable.add_row(network)
-        networkstable.align["Network"] = "l"
-        print(networkstable)
+            networkslist = ([network.network, network.type, network.cidr, network.dhcp,
+                             network.domain if network.domain != '' else 'N/A', network.mode] for network in networks)
+            stream_table(["Network", "Type", "Cidr", "Dhcp", "Domain", "Mode"], networkslist,
+                         widths=[20, 8, 18, 5, 10, 8])
         return
     else:
         subnets = k.list_subnets(empty())
@@ -880,17 +874,8 @@ def list_vmdisk(args):
     config = Kconfig(client=args.client, debug=args.debug, region=args.region, zone=args.zone, namespace=args.namespace)
     k = config.k
     pprint("Listing disks...")
-    diskstable = PrettyTable(["Name", "Pool", "Path"])
-    diskstable.align["Name"] = "l"
-    finaldisks = []
-    disks = k.list_disks(empty())
-    for disk in disks.disks:
-        path = disks.disk.path
-        pool = disks.disk.pool
-        finaldisks.append([disk, pool, path])
-    for disk in sorted(finaldisks):
-        diskstable.add_row(disk)
-    print(diskstable)
+    disks = ([disk.disk, disk.pool, disk.path] for disk in k.stream_list_disks(empty()))
+    stream_table(["Name", "Pool", "Path"], disks, widths=[30, 10, 60])
     return
 
 
@@ -2916,6 +2901,8 @@ def cli():
     vmlist_desc = 'List Vms'
     vmlist_parser = argparse.ArgumentParser(add_help=False)
     vmlist_parser.add_argument('--filters', choices=('up', 'down'))
+    vmlist_parser.add_argument('-w', '--watch', action='store_true',
+                               help='Watch vms, printing when they get created, deleted, started, stopped or get an ip')
     vmlist_parser.set_defaults(func=list_vm)
     list_subparsers.add_parser('vm', parents=[vmlist_parser], description=vmlist_desc, help=vmlist_desc,
                                aliases=['vms'])
@@ -128,6 +128,31 @@ class KcliStub(object):
                 request_serializer=kcli__pb2.pool.SerializeToString,
                 response_deserializer=kcli__pb2.result.FromString,
                 )
+        self.stream_list = channel.unary_stream(
+                '/Kcli/stream_list',
+                request_serializer=kcli__pb2.client.SerializeToString,
+                response_deserializer=kcli__pb2.vminfo.FromString,
+                )
+        self.stream_list_disks = channel.unary_stream(
+                '/Kcli/stream_list_disks',
+                request_serializer=kcli__pb2.empty.SerializeToString,
+                response_deserializer=kcli__pb2.disk.FromString,
+                )
+        self.stream_list_images = channel.unary_stream(
+                '/Kcli/stream_list_images',
+                request_serializer=kcli__pb2.empty.SerializeToString,
+                response_deserializer=kcli__pb2.image.FromString,
+                )
+        self.stream_list_networks = channel.unary_stream(
+                '/Kcli/stream_list_networks',
+                request_serializer=kcli__pb2.empty.SerializeToString,
+                response_deserializer=kcli__pb2.network.FromString,
+                )
+        self.watch_list = channel.unary_stream(
+                '/Kcli/watch_list',
+                request_serializer=kcli__pb2.client.SerializeToString,
+                response_deserializer=kcli__pb2.vmevent.FromString,
+                )
 
 
 class KcliServicer(object):
@@ -271,6 +296,36 @@ class KcliServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def stream_list(self, request, context):
+        """Missing associated documentation comment in .proto file"""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def stream_list_disks(self, request, context):
+        """Missing associated documentation comment in .proto file"""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def stream_list_images(self, request, context):
+        """Missing associated documentation comment in .proto file"""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def stream_list_networks(self, request, context):
+        """Missing associated documentation comment in .proto file"""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def watch_list(self, request, context):
+        """Missing associated documentation comment in .proto file"""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_KcliServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -389,6 +444,31 @@ def add_KcliServicer_to_server(servicer, server):
                     request_deserializer=kcli__pb2.pool.FromString,
                     response_serializer=kcli__pb2.result.SerializeToString,
             ),
+            'stream_list': grpc.unary_stream_rpc_method_handler(
+                    servicer.stream_list,
+                    request_deserializer=kcli__pb2.client.FromString,
+                    response_serializer=kcli__pb2.vminfo.SerializeToString,
+            ),
+            'stream_list_disks': grpc.unary_stream_rpc_method_handler(
+                    servicer.stream_list_disks,
+                    request_deserializer=kcli__pb2.empty.FromString,
+                    response_serializer=kcli__pb2.disk.SerializeToString,
+            ),
+            'stream_list_images': grpc.unary_stream_rpc_method_handler(
+                    servicer.stream_list_images,
+                    request_deserializer=kcli__pb2.empty.FromString,
+                    response_serializer=kcli__pb2.image.SerializeToString,
+            ),
+            'stream_list_networks': grpc.unary_stream_rpc_method_handler(
+                    servicer.stream_list_networks,
+                    request_deserializer=kcli__pb2.empty.FromString,
+                    response_serializer=kcli__pb2.network.SerializeToString,
+            ),
+            'watch_list': grpc.unary_stream_rpc_method_handler(
+                    servicer.watch_list,
+                    request_deserializer=kcli__pb2.client.FromString,
+                    response_serializer=kcli__pb2.vmevent.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'Kcli', rpc_method_handlers)
@@ -767,6 +847,86 @@ class Kcli(object):
             options, channel_credentials,
             call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def stream_list(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Kcli/stream_list',
+            kcli__pb2.client.SerializeToString,
+            kcli__pb2.vminfo.FromString,
+            options, channel_credentials,
+            call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def stream_list_disks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Kcli/stream_list_disks',
+            kcli__pb2.empty.SerializeToString,
+            kcli__pb2.disk.FromString,
+            options, channel_credentials,
+            call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def stream_list_images(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Kcli/stream_list_images',
+            kcli__pb2.empty.SerializeToString,
+            kcli__pb2.image.FromString,
+            options, channel_credentials,
+            call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def stream_list_networks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Kcli/stream_list_networks',
+            kcli__pb2.empty.SerializeToString,
+            kcli__pb2.network.FromString,
+            options, channel_credentials,
+            call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def watch_list(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Kcli/watch_list',
+            kcli__pb2.client.SerializeToString,
+            kcli__pb2.vmevent.FromString,
+            options, channel_credentials,
+            call_credentials, compression, wait_for_ready, timeout, metadata)
+
 
 class KconfigStub(object):
     """Missing associated documentation comment in .proto file"""
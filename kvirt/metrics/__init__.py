@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+capacity metrics of clients, cached between scrapes
+"""
+
+from threading import Lock
+from time import time
+
+METRICSTTL = 30
+MB = 1024 * 1024
+GB = 1024 * MB
+HOSTMETRICS = [('kcli_host_cpus', 'Number of cpus of the host', 'cpus', 1),
+               ('kcli_host_memory_bytes', 'Total memory of the host', 'memory', MB),
+               ('kcli_host_memory_free_bytes', 'Free memory of the host', 'freememory', MB),
+               ('kcli_host_memory_assigned_bytes', 'Memory assigned to running vms', 'usedmemory', MB),
+               ('kcli_host_vcpus_assigned', 'Number of vcpus assigned to running vms', 'usedcpus', 1),
+               ('kcli_vms', 'Number of vms defined on the host', 'vms', 1),
+               ('kcli_vms_running', 'Number of running vms on the host', 'runningvms', 1)]
+POOLMETRICS = [('kcli_pool_used_bytes', 'Used space of the pool', 'used', GB),
+               ('kcli_pool_available_bytes', 'Available space of the pool', 'available', GB)]
+
+cache = {}
+cache_lock = Lock()
+
+
+def get_metrics(client, connect, ttl=METRICSTTL):
+    """Return metrics of a client, only calling connect to gather them when cached ones are older than ttl"""
+    with cache_lock:
+        if client in cache and time() - cache[client]['timestamp'] < ttl:
+            return cache[client]['metrics']
+    k = connect()
+    metrics = k.get_metrics() if hasattr(k, 'get_metrics') else None
+    with cache_lock:
+        cache[client] = {'timestamp': time(), 'metrics': metrics}
+    return metrics
+
+
+def _labels(labels):
+    escaped = {}
+    for key in labels:
+        escaped[key] = str(labels[key]).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join('%s="%s"' % (key, escaped[key]) for key in labels)
+
+
+def prometheus(allmetrics):
+    """Render metrics of several clients in prometheus text format"""
+    lines = []
+    clients = [client for client in allmetrics if allmetrics[client] is not None]
+    for name, description, key, factor in HOSTMETRICS:
+        lines.extend(["# HELP %s %s" % (name, description), "# TYPE %s gauge" % name])
+        for client in clients:
+            lines.append("%s{%s} %s" % (name, _labels({'client': client}), allmetrics[client][key] * factor))
+    for name, description, key, factor in POOLMETRICS:
+        lines.extend(["# HELP %s %s" % (name, description), "# TYPE %s gauge" % name])
+        for client in clients:
+            for poolname, pool in allmetrics[client]['pools'].items():
+                labels = {'client': client, 'pool': poolname, 'type': pool['type'], 'path': pool['path']}
+                lines.append("%s{%s} %s" % (name, _labels(labels), int(pool[key] * factor)))
+    lines.extend(["# HELP kcli_network_info Networks of the host", "# TYPE kcli_network_info gauge"])
+    for client in clients:
+        for networkname, network in allmetrics[client]['networks'].items():
+            labels = {'client': client, 'network': networkname}
+            labels.update(network)
+            lines.append("kcli_network_info{%s} 1" % _labels(labels))
+    return '\n'.join(lines) + '\n'
@@ -556,7 +556,7 @@ def create(config, plandir, cluster, overrides):
             sys.exit(1)
     clusterdir = os.path.expanduser("~/.kcli/clusters/%s" % cluster)
     if os.path.exists(clusterdir):
-        if [v for v in config.k.list() if v.get('plan', 'kvirt') == cluster]:
+        if [v for v in config.k.list(filters={'plan': cluster}) if v.get('plan', 'kvirt') == cluster]:
             error("Please remove existing directory %s first..." % clusterdir)
             sys.exit(1)
         else:
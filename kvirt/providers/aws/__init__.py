@@ -22,6 +22,8 @@ staticf = {'t2.nano': {'cpus': 1, 'memory': 512}, 't2.micro': {'cpus': 1, 'memor
            'm5.large': {'cpus': 2, 'memory': 8144}, 'm5.xlarge': {'cpus': 4, 'memory': 16384},
            'm5.2xlarge': {'cpus': 8, 'memory': 32768}, 'm5.4xlarge': {'cpus': 16, 'memory': 65536}
            }
+amis = {}
+MAXFILTERVALUES = 200
 
 
 class Kaws(object):
@@ -332,17 +334,41 @@ class Kaws(object):
         status = vm['State']['Name']
         return status
 
-    def list(self):
+    def list(self, filters=None):
         conn = self.conn
         vms = []
-        results = conn.describe_instances()
-        reservations = results['Reservations']
-        for reservation in reservations:
-            vm = reservation['Instances'][0]
-            name = vm['InstanceId']
-            vms.append(self.info(name))
+        instances = []
+        filters = filters or {}
+        Filters = []
+        if filters.get('name') is not None:
+            Filters.append({'Name': "tag:Name", 'Values': ["%s*" % filters['name']]})
+        if filters.get('status') is not None:
+            status = {'up': 'running', 'down': 'stopped'}.get(filters['status'], filters['status'])
+            Filters.append({'Name': "instance-state-name", 'Values': [status]})
+        tags = {key: filters[key] for key in ['plan', 'kube'] if filters.get(key) is not None}
+        tags.update(filters.get('labels', {}))
+        for key in tags:
+            Filters.append({'Name': "tag:%s" % key, 'Values': [tags[key]]})
+        for page in conn.get_paginator('describe_instances').paginate(Filters=Filters):
+            for reservation in page['Reservations']:
+                instances.extend(reservation['Instances'])
+        self.get_image_sources([vm['ImageId'] for vm in instances])
+        for vm in instances:
+            vms.append(self.info(vm['InstanceId'], vm=vm, ignore_volumes=True))
         return sorted(vms, key=lambda x: x['name'])
 
+    def get_image_sources(self, amids):
+        missing = sorted(set([amid for amid in amids if amid not in amis]))
+        if missing:
+            for index in range(0, len(missing), MAXFILTERVALUES):
+                Filters = [{'Name': 'image-id', 'Values': missing[index:index + MAXFILTERVALUES]}]
+                for image in self.conn.describe_images(Filters=Filters)['Images']:
+                    amis[image['ImageId']] = os.path.basename(image.get('ImageLocation', ''))
+            for amid in missing:
+                if amid not in amis:
+                    amis[amid] = ''
+        return {amid: amis[amid] for amid in amids}
+
     def console(self, name, tunnel=False, web=False):
         try:
             if name.startswith('i-'):
@@ -450,10 +476,9 @@ class Kaws(object):
                         break
         return vpcid
 
-    def info(self, name, vm=None, debug=False):
+    def info(self, name, vm=None, debug=False, ignore_volumes=False):
         yamlinfo = {}
         conn = self.conn
-        resource = self.resource
         if vm is None:
             try:
                 if name.startswith('i-'):
@@ -470,8 +495,7 @@ class Kaws(object):
         ip = vm['PublicIpAddress'] if 'PublicIpAddress' in vm else ''
         amid = vm['ImageId']
         az = vm['Placement']['AvailabilityZone']
-        image = resource.Image(amid)
-        source = os.path.basename(image.image_location)
+        source = self.get_image_sources([amid])[amid]
         yamlinfo['plan'] = ''
         yamlinfo['profile'] = ''
         if 'Tags' in vm:
@@ -505,15 +529,17 @@ class Kaws(object):
         if nets:
             yamlinfo['nets'] = nets
         disks = []
-        for index, disk in enumerate(vm['BlockDeviceMappings']):
-            devname = disk['DeviceName']
-            volumeid = disk['Ebs']['VolumeId']
-            volume = conn.describe_volumes(VolumeIds=[volumeid])['Volumes'][0]
-            disksize = volume['Size']
-            diskformat = volume['AvailabilityZone']
-            drivertype = volume['VolumeType']
-            path = volumeid
-            disks.append({'device': devname, 'size': disksize, 'format': diskformat, 'type': drivertype, 'path': path})
+        if not ignore_volumes:
+            for index, disk in enumerate(vm['BlockDeviceMappings']):
+                devname = disk['DeviceName']
+                volumeid = disk['Ebs']['VolumeId']
+                volume = conn.describe_volumes(VolumeIds=[volumeid])['Volumes'][0]
+                disksize = volume['Size']
+                diskformat = volume['AvailabilityZone']
+                drivertype = volume['VolumeType']
+                path = volumeid
+                disks.append({'device': devname, 'size': disksize, 'format': diskformat, 'type': drivertype,
+                              'path': path})
         if disks:
             yamlinfo['disks'] = disks
         if debug:
@@ -16,6 +16,7 @@ import googleapiclient.discovery
 from google.cloud import dns, storage
 from netaddr import IPNetwork
 import os
+import re
 import sys
 from time import sleep
 import webbrowser
@@ -29,14 +30,34 @@ class Kgcp(object):
 
     """
     def __init__(self, debug=False, project="kubevirt-button", zone="europe-west1-b",
-                 region='europe-west1'):
+                 region='europe-west1', allzones=False):
         self.conn = googleapiclient.discovery.build('compute', 'v1')
         self.project = project
         self.zone = zone
         self.region = region
+        self.allzones = allzones
         self.debug = debug
         return
 
+    def _list_items(self, collection, key, filter=None):
+        project = self.project
+        kwargs = {'filter': filter} if filter is not None else {}
+        if self.allzones:
+            request = collection.aggregatedList(project=project, **kwargs)
+        else:
+            request = collection.list(project=project, zone=self.zone, **kwargs)
+        while request is not None:
+            results = request.execute()
+            if self.allzones:
+                for scope in results.get('items', {}).values():
+                    for item in scope.get(key, []):
+                        yield item
+                request = collection.aggregatedList_next(previous_request=request, previous_response=results)
+            else:
+                for item in results.get('items', []):
+                    yield item
+                request = collection.list_next(previous_request=request, previous_response=results)
+
     def _wait_for_operation(self, operation):
         selflink = operation['selfLink']
         operation = operation['name']
@@ -406,16 +427,22 @@ class Kgcp(object):
             error("Vm %s not found" % name)
         return status
 
-    def list(self):
+    def list(self, filters=None):
         conn = self.conn
-        project = self.project
-        zone = self.zone
         vms = []
-        results = conn.instances().list(project=project, zone=zone).execute()
-        if 'items' not in results:
-            return []
-        for vm in results['items']:
-            vms.append(self.info(vm['name'], vm=vm))
+        filters = filters or {}
+        # only a single regular expression can be used, so name prefix gets evaluated by the api
+        namefilter = "name eq '%s.*'" % re.escape(filters['name']) if filters.get('name') is not None else None
+        if filters.get('status') is not None:
+            filters = filters.copy()
+            filters['status'] = {'up': 'RUNNING', 'down': 'TERMINATED'}.get(filters['status'], filters['status'])
+        disks = None
+        for vm in self._list_items(conn.instances(), 'instances', filter=namefilter):
+            if disks is None:
+                disks = {disk['selfLink']: disk for disk in self._list_items(conn.disks(), 'disks')}
+            vminfo = self.info(vm['name'], vm=vm, disks=disks)
+            if common.vm_matches(vminfo, filters):
+                vms.append(vminfo)
         return sorted(vms, key=lambda x: x['name'])
 
     def console(self, name, tunnel=False, web=False):
@@ -473,7 +500,7 @@ class Kgcp(object):
                     domain = data['value']
         return dnsclient, domain
 
-    def info(self, name, vm=None, debug=False):
+    def info(self, name, vm=None, debug=False, disks=None):
         yamlinfo = {}
         conn = self.conn
         project = self.project
@@ -493,8 +520,13 @@ class Kgcp(object):
         yamlinfo['autostart'] = vm['scheduling']['automaticRestart']
         if 'accessConfigs' in vm['networkInterfaces'][0] and 'natIP' in vm['networkInterfaces'][0]['accessConfigs'][0]:
             yamlinfo['ip'] = vm['networkInterfaces'][0]['accessConfigs'][0]['natIP']
-        source = os.path.basename(vm['disks'][0]['source'])
-        source = conn.disks().get(zone=zone, project=self.project, disk=source).execute()
+        disks = disks if disks is not None else {}
+        for disk in vm['disks']:
+            if disk['source'] not in disks:
+                diskzone = disk['source'].split('/')[-3]
+                diskname = os.path.basename(disk['source'])
+                disks[disk['source']] = conn.disks().get(zone=diskzone, project=project, disk=diskname).execute()
+        source = disks[vm['disks'][0]['source']]
         if 'sourceImage' in source:
             yamlinfo['image'] = os.path.basename(source['sourceImage'])
         elif 'licenses' in vm['disks'][0]:
@@ -514,18 +546,17 @@ class Kgcp(object):
             nets.append({'device': device, 'mac': private_ip, 'net': network, 'type': network_type})
         if nets:
             yamlinfo['nets'] = nets
-        disks = []
+        vmdisks = []
         for index, disk in enumerate(vm['disks']):
             devname = disk['deviceName']
-            diskname = os.path.basename(disk['source'])
             diskformat = disk['interface']
             drivertype = disk['type']
             path = os.path.basename(disk['source'])
-            diskinfo = conn.disks().get(zone=zone, project=project, disk=diskname).execute()
-            disksize = int(diskinfo['sizeGb'])
-            disks.append({'device': devname, 'size': disksize, 'format': diskformat, 'type': drivertype, 'path': path})
-        if disks:
-            yamlinfo['disks'] = disks
+            disksize = int(disks[disk['source']]['sizeGb'])
+            vmdisks.append({'device': devname, 'size': disksize, 'format': diskformat, 'type': drivertype,
+                            'path': path})
+        if vmdisks:
+            yamlinfo['disks'] = vmdisks
         if 'items' in vm['metadata']:
             for data in vm['metadata']['items']:
                 if data['key'] in METADATA_FIELDS:
@@ -768,16 +799,12 @@ class Kgcp(object):
     def list_disks(self):
         disks = {}
         conn = self.conn
-        project = self.project
-        zone = self.zone
-        alldisks = conn.disks().list(zone=zone, project=project).execute()
-        if 'items' in alldisks:
-            for disk in alldisks['items']:
-                if self.debug:
-                    print(disk)
-                diskname = disk['name']
-                pool = os.path.basename(disk['type'])
-                disks[diskname] = {'pool': pool, 'path': zone}
+        for disk in self._list_items(conn.disks(), 'disks'):
+            if self.debug:
+                print(disk)
+            diskname = disk['name']
+            pool = os.path.basename(disk['type'])
+            disks[diskname] = {'pool': pool, 'path': os.path.basename(disk['zone'])}
         return disks
 
     def add_nic(self, name, network):
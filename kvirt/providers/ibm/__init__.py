@@ -13,7 +13,8 @@ import ibm_boto3
 from ibm_botocore.client import Config
 from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
 from ibm_cloud_sdk_core.api_exception import ApiException
-from ibm_platform_services import GlobalTaggingV1, ResourceControllerV2, IamPolicyManagementV1, IamIdentityV1
+from ibm_platform_services import GlobalSearchV2, GlobalTaggingV1, ResourceControllerV2, IamPolicyManagementV1
+from ibm_platform_services import IamIdentityV1
 from ibm_platform_services.iam_policy_management_v1 import PolicySubject, SubjectAttribute, PolicyResource, PolicyRole
 from ibm_platform_services.iam_policy_management_v1 import ResourceAttribute
 from ibm_cloud_networking_services import DnsRecordsV1, ZonesV1
@@ -21,6 +22,7 @@ from netaddr import IPNetwork
 import os
 from time import sleep
 from requests import get, post
+from urllib.parse import parse_qs, urlparse
 
 import webbrowser
 
@@ -92,6 +94,7 @@ class Kibm(object):
             self.cos_resource_instance_id = cos_resource_instance_id
         self.global_tagging_service = GlobalTaggingV1(authenticator=self.authenticator)
         self.global_tagging_service.set_service_url('https://tags.global-search-tagging.cloud.ibm.com')
+        self.global_search_service = GlobalSearchV2(authenticator=self.authenticator)
         if cis_resource_instance_id is not None:
             cis_resource_instance_id = get_service_instance_id(iam_api_key, cis_resource_instance_id)
             self.dns = ZonesV1(authenticator=self.authenticator, crn=cis_resource_instance_id)
@@ -355,21 +358,32 @@ class Kibm(object):
         except ApiException as exc:
             return {'result': 'failure', 'reason': 'Unable to retrieve VM %s. %s' % (name, exc)}
 
-    def list(self):
+    def list(self, filters=None):
         vms = []
         try:
             provisioned_vms = self._get_vms()
         except ApiException as exc:
             error('Unable to retrieve VMs. %s' % exc)
             return vms
+        if filters is not None and filters.get('name') is not None:
+            provisioned_vms = [vm for vm in provisioned_vms if vm['name'].startswith(filters['name'])]
+        if not provisioned_vms:
+            return vms
         try:
             floating_ips = {x['target']['id']: x for x in self.conn.list_floating_ips(
             ).result['floating_ips'] if x['status'] == 'available' and 'target' in x}
         except ApiException as exc:
             error('Unable to retrieve floating ips. %s' % exc)
             return vms
+        try:
+            tags = self._get_vms_tags()
+        except ApiException as exc:
+            error('Unable to retrieve tags. %s' % exc)
+            tags = None
         for vm in provisioned_vms:
-            vms.append(self.info(vm['name'], vm=vm, ignore_volumes=True, floating_ips=floating_ips))
+            vminfo = self.info(vm['name'], vm=vm, ignore_volumes=True, floating_ips=floating_ips, tags=tags)
+            if common.vm_matches(vminfo, filters):
+                vms.append(vminfo)
         return sorted(vms, key=lambda x: x['name'])
 
     def console(self, name, tunnel=False, web=False):
@@ -423,7 +437,7 @@ class Kibm(object):
         return None
 
     def info(self, name, output='plain', fields=[], values=False, vm=None, ignore_volumes=False, floating_ips=None,
-             debug=False):
+             debug=False, tags=None):
         yamlinfo = {}
         if vm is None:
             try:
@@ -470,18 +484,17 @@ class Kibm(object):
         # yamlinfo['vpc'] = vm['vpc']['name']
         yamlinfo['profile'] = ''
         yamlinfo['plan'] = ''
-        tag_list = self.global_tagging_service.list_tags(attached_to=vm['crn']).get_result().items()
-        for entry in tag_list:
-            if entry[0] != 'items':
-                continue
-            tags = entry[1]
-            for tag in tags:
-                tagname = tag['name']
-                if tagname.count(':') == 1:
-                    key, value = tagname.split(':')
-                    if key in METADATA_FIELDS:
-                        yamlinfo[key] = value
-            break
+        # recently created or tagged instances take a while to show up in the global search index
+        if tags is not None and vm['crn'] in tags:
+            tagnames = tags[vm['crn']]
+        else:
+            tag_list = self.global_tagging_service.list_tags(attached_to=vm['crn']).get_result()
+            tagnames = [tag['name'] for tag in tag_list.get('items', [])]
+        for tagname in tagnames:
+            if tagname.count(':') == 1:
+                key, value = tagname.split(':')
+                if key in METADATA_FIELDS:
+                    yamlinfo[key] = value
         nets = []
         for interface in vm['network_interfaces']:
             network = interface['subnet']['name']
@@ -1313,11 +1326,29 @@ class Kibm(object):
             return None
         return result['instances'][0]
 
+    def _get_vms_tags(self):
+        tags = {}
+        search_cursor = None
+        while True:
+            result = self.global_search_service.search(query='family:is AND type:instance', fields=['crn', 'tags'],
+                                                       search_cursor=search_cursor, limit=1000).get_result()
+            for item in result.get('items', []):
+                tags[item['crn']] = item.get('tags', [])
+            search_cursor = result.get('search_cursor')
+            if search_cursor is None or len(result.get('items', [])) < 1000:
+                break
+        return tags
+
     def _get_vms(self):
-        result = self.conn.list_instances().result
-        if result['total_count'] == 0:
-            return []
-        return result['instances']
+        vms = []
+        start = None
+        while True:
+            result = self.conn.list_instances(start=start, limit=100).result
+            vms.extend(result['instances'])
+            if 'next' not in result:
+                break
+            start = parse_qs(urlparse(result['next']['href']).query)['start'][0]
+        return vms
 
     def _get_subnet(self, name):
         subnets = self._get_subnets()
@@ -5,7 +5,7 @@ Kubevirt Provider Class
 """
 
 import base64
-from kubernetes import client
+from kubernetes import client, watch
 # from kubernetes.stream import stream
 from kvirt.kubecommon import Kubecommon
 from netaddr import IPAddress
@@ -14,7 +14,9 @@ from kvirt.common import error, pprint, warning
 from kvirt.defaults import IMAGES, UBUNTUS, METADATA_FIELDS
 import datetime
 import os
+from queue import Queue, Empty
 import sys
+from threading import Event, Thread
 import time
 import yaml
 import urllib3
@@ -520,14 +522,36 @@ class Kubevirt(Kubecommon):
             return 'up'
         return 'down'
 
-    def list(self):
+    def list(self, label_selector=None, field_selector=None, filters=None):
         crds = self.crds
         namespace = self.namespace
         vms = []
-        for vm in crds.list_namespaced_custom_object(DOMAIN, VERSION, namespace, 'virtualmachines')["items"]:
+        selectors = {}
+        filters = filters or {}
+        if filters.get('labels'):
+            labels = ','.join("%s=%s" % (key, filters['labels'][key]) for key in filters['labels'])
+            label_selector = "%s,%s" % (label_selector, labels) if label_selector is not None else labels
+        if label_selector is not None:
+            selectors['label_selector'] = label_selector
+        if field_selector is not None:
+            selectors['field_selector'] = field_selector
+        allvms = crds.list_namespaced_custom_object(DOMAIN, VERSION, namespace, 'virtualmachines', **selectors)["items"]
+        # plan and kube are stored as annotations, which can't be selected on server side
+        annotations = {'kcli/%s' % key: filters[key] for key in ['plan', 'kube'] if filters.get(key) is not None}
+        allvms = [vm for vm in allvms if vm['metadata']['name'].startswith(filters.get('name') or '') and
+                  all((vm['metadata'].get('annotations') or {}).get(key) == annotations[key] for key in annotations)]
+        if not allvms:
+            return vms
+        vmiselectors = {'field_selector': field_selector} if field_selector is not None else {}
+        allvmis = crds.list_namespaced_custom_object(DOMAIN, VERSION, namespace, 'virtualmachineinstances',
+                                                     **vmiselectors)["items"]
+        vmis = {vmi['metadata']['name']: vmi for vmi in allvmis}
+        for vm in allvms:
             metadata = vm.get("metadata")
             name = metadata["name"]
-            vms.append(self.info(name, vm=vm))
+            vminfo = self.info(name, vm=vm, vmis=vmis)
+            if filters.get('status') is None or vminfo.get('status') == filters['status']:
+                vms.append(vminfo)
         return sorted(vms, key=lambda x: x['name'])
 
     def console(self, name, tunnel=False, web=False):
@@ -617,7 +641,7 @@ class Kubevirt(Kubecommon):
                 domain = annotations['kcli/domain']
         return dnsclient, domain
 
-    def info(self, name, vm=None, debug=False):
+    def info(self, name, vm=None, debug=False, vmis=None):
         yamlinfo = {}
         core = self.core
         crds = self.crds
@@ -662,7 +686,11 @@ class Kubevirt(Kubecommon):
         ips = []
         if running:
             try:
-                runvm = crds.get_namespaced_custom_object(DOMAIN, VERSION, namespace, 'virtualmachineinstances', name)
+                if vmis is not None:
+                    runvm = vmis[name]
+                else:
+                    runvm = crds.get_namespaced_custom_object(DOMAIN, VERSION, namespace, 'virtualmachineinstances',
+                                                              name)
                 status = runvm.get('status')
                 if status:
                     state = status.get('phase').replace('Running', 'up')
@@ -774,6 +802,62 @@ class Kubevirt(Kubecommon):
             yamlinfo['debug'] = common.pretty_print(vm)
         return yamlinfo
 
+    def watch_vm(self, name, timeout=5):
+        """Block until the vmi of the vm changes or timeout expires"""
+        crds = self.crds
+        namespace = self.namespace
+        field_selector = 'metadata.name=%s' % name
+        w = watch.Watch()
+        try:
+            vmis = crds.list_namespaced_custom_object(DOMAIN, VERSION, namespace, 'virtualmachineinstances',
+                                                      field_selector=field_selector)
+            resource_version = vmis['metadata']['resourceVersion']
+            for event in w.stream(crds.list_namespaced_custom_object, DOMAIN, VERSION, namespace,
+                                  'virtualmachineinstances', field_selector=field_selector,
+                                  resource_version=resource_version, timeout_seconds=timeout):
+                break
+        except Exception:
+            time.sleep(timeout)
+        finally:
+            w.stop()
+
+    def watch_vms(self, timeout=5):
+        """Yield names of vms or vmis with a watch event, or None when no event happened during timeout seconds"""
+        crds = self.crds
+        namespace = self.namespace
+        events = Queue()
+        stop = Event()
+        watchers = {}
+
+        def _watch(plural):
+            while not stop.is_set():
+                w = watch.Watch()
+                watchers[plural] = w
+                try:
+                    objs = crds.list_namespaced_custom_object(DOMAIN, VERSION, namespace, plural)
+                    resource_version = objs['metadata']['resourceVersion']
+                    for event in w.stream(crds.list_namespaced_custom_object, DOMAIN, VERSION, namespace, plural,
+                                          resource_version=resource_version, timeout_seconds=60):
+                        if stop.is_set():
+                            break
+                        events.put(event['object']['metadata']['name'])
+                except Exception:
+                    stop.wait(timeout)
+                finally:
+                    w.stop()
+        for plural in ['virtualmachines', 'virtualmachineinstances']:
+            Thread(target=_watch, args=(plural,), daemon=True).start()
+        try:
+            while True:
+                try:
+                    yield events.get(timeout=timeout)
+                except Empty:
+                    yield None
+        finally:
+            stop.set()
+            for w in watchers.values():
+                w.stop()
+
     def ip(self, name):
         crds = self.crds
         namespace = self.namespace
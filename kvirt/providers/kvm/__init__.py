@@ -11,25 +11,32 @@ from kvirt.defaults import IMAGES
 from kvirt.defaults import UBUNTUS, METADATA_FIELDS
 from kvirt import common
 from kvirt.common import error, pprint, warning
+from kvirt import imagefetch
 from netaddr import IPAddress, IPNetwork
 from libvirt import open as libvirtopen, registerErrorHandler, libvirtError
-from libvirt import VIR_DOMAIN_AFFECT_LIVE, VIR_DOMAIN_AFFECT_CONFIG
+from libvirt import VIR_DOMAIN_AFFECT_LIVE, VIR_DOMAIN_AFFECT_CONFIG, VIR_DOMAIN_METADATA_ELEMENT
 from libvirt import VIR_DOMAIN_INTERFACE_ADDRESSES_SRC_AGENT as vir_src_agent
 from libvirt import VIR_DOMAIN_INTERFACE_ADDRESSES_SRC_LEASE as vir_src_lease
 from libvirt import (VIR_DOMAIN_NOSTATE, VIR_DOMAIN_RUNNING, VIR_DOMAIN_BLOCKED, VIR_DOMAIN_PAUSED,
                      VIR_DOMAIN_SHUTDOWN, VIR_DOMAIN_SHUTOFF, VIR_DOMAIN_CRASHED)
-from libvirt import VIR_CONNECT_LIST_STORAGE_POOLS_ACTIVE
+from libvirt import VIR_CONNECT_LIST_STORAGE_POOLS_ACTIVE, VIR_DOMAIN_STATS_STATE
+from libvirt import VIR_DOMAIN_STATS_VCPU, VIR_DOMAIN_STATS_BALLOON, VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE
+from libvirt import VIR_CONNECT_GET_ALL_DOMAINS_STATS_RUNNING, VIR_CONNECT_GET_ALL_DOMAINS_STATS_SHUTOFF
+from libvirt import VIR_DOMAIN_EVENT_ID_LIFECYCLE, virEventRegisterDefaultImpl, virEventRunDefaultImpl
 try:
     from libvirt import VIR_DOMAIN_UNDEFINE_KEEP_NVRAM
 except:
     pass
 from pwd import getpwuid
+from queue import Queue, Empty
 import json
 import os
 from subprocess import call
 import re
+import shlex
 import string
 from tempfile import TemporaryDirectory
+from threading import Event, Lock, Thread
 import time
 import xml.etree.ElementTree as ET
 
@@ -57,6 +64,8 @@ LIBVIRT_FLAGS_CONFIG = 2
 
 KB = 1024 * 1024
 MB = 1024 * KB
+UPLOADCHUNK = 4 * 1024 * 1024
+METRICSTTL = 300
 guestrhel532 = "rhel_5"
 guestrhel564 = "rhel_5x64"
 guestrhel632 = "rhel_6"
@@ -88,6 +97,23 @@ def libvirt_callback(ignore, err):
 
 
 registerErrorHandler(f=libvirt_callback, ctx=None)
+eventloop_lock = Lock()
+eventloop_running = False
+
+
+def start_eventloop():
+    """Register and run libvirt default event loop in a daemon thread, only once per process"""
+    global eventloop_running
+    with eventloop_lock:
+        if eventloop_running:
+            return
+        virEventRegisterDefaultImpl()
+
+        def _run():
+            while True:
+                virEventRunDefaultImpl()
+        Thread(target=_run, daemon=True).start()
+        eventloop_running = True
 
 
 class Kvirt(object):
@@ -95,7 +121,7 @@ class Kvirt(object):
 
     """
     def __init__(self, host='127.0.0.1', port=None, user='root', protocol='ssh', url=None, debug=False, insecure=False,
-                 session=False, remotednsmasq=False):
+                 session=False, remotednsmasq=False, imagecache=False, imagecachesize=imagefetch.CACHESIZE):
         if url is None:
             socketf = '/var/run/libvirt/libvirt-sock' if not session else '/home/%s/.cache/libvirt/libvirt-sock' % user
             conntype = 'system' if not session else 'session'
@@ -144,6 +170,9 @@ class Kvirt(object):
         else:
             self.identitycommand = ""
         self.remotednsmasq = remotednsmasq
+        self.imagecache = imagecache
+        self.imagecachesize = imagecachesize
+        self.metrics_details = {'pools': {}, 'networks': {}}
 
     def close(self):
         conn = self.conn
@@ -754,9 +783,8 @@ class Kvirt(object):
                                                                    enableroot=enableroot, overrides=overrides,
                                                                    storemetadata=storemetadata, image=image, ipv6=ipv6,
                                                                    machine=dest_machine)
-                with TemporaryDirectory() as tmpdir:
-                    common.make_iso(name, tmpdir, userdata, metadata, netdata, openstack=openstack)
-                    self._uploadimage(name, pool=default_storagepool, origin=tmpdir)
+                isodata = common.get_cloudinit_iso(userdata, metadata, netdata, openstack=openstack)
+                self._uploadimage(name, pool=default_storagepool, data=isodata)
         listen = '0.0.0.0' if self.host not in ['localhost', '127.0.0.1'] else '127.0.0.1'
         if aarch64:
             displayxml = ''
@@ -1291,76 +1319,103 @@ class Kvirt(object):
             usedmemory += mem
         return True if usedmemory + memory > totalmemory else False
 
-    def report(self):
+    def get_capacity(self):
         conn = self.conn
-        status = {0: 'down', 1: 'up'}
-        hostname = conn.getHostname()
-        cpus = conn.getCPUMap()[0]
-        totalmemory = conn.getInfo()[1]
-        print("Connection: %s" % self.url)
-        print("Host: %s" % hostname)
-        print("Cpus: %s" % cpus)
-        totalvms = 0
-        usedmemory = 0
-        for vm in conn.listAllDomains(0):
-            if status[vm.isActive()] == "down":
-                continue
-            totalvms += 1
-            xml = vm.XMLDesc(0)
-            root = ET.fromstring(xml)
-            memory = list(root.iter('memory'))[0]
-            unit = memory.attrib['unit']
-            memory = memory.text
-            if unit == 'KiB':
-                memory = float(memory) / 1024
-                memory = int(memory)
-            usedmemory += memory
-        print("Vms Running: %s" % totalvms)
-        print("Total Memory Assigned: %sMB of %sMB" % (usedmemory, totalmemory))
+        _, memory, cpus = conn.getInfo()[:3]
+        usedcpus = 0
+        for vm, stats in conn.getAllDomainStats(VIR_DOMAIN_STATS_VCPU, VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE):
+            usedcpus += stats.get('vcpu.current', 0)
+        pools = {}
         for pool in conn.listAllStoragePools(VIR_CONNECT_LIST_STORAGE_POOLS_ACTIVE):
+            s = pool.info()
+            pools[pool.name()] = {'total': s[1] / 1024 / 1024 / 1024, 'free': s[3] / 1024 / 1024 / 1024}
+        freememory = int(conn.getFreeMemory() / 1024 / 1024)
+        return {'cpus': cpus, 'memory': memory, 'freememory': freememory, 'usedcpus': usedcpus, 'pools': pools}
+
+    def get_metrics(self):
+        conn = self.conn
+        _, memory, cpus = conn.getInfo()[:3]
+        metrics = {'connection': self.url, 'host': conn.getHostname(), 'cpus': cpus, 'memory': memory,
+                   'freememory': int(conn.getFreeMemory() / 1024 / 1024), 'vms': 0, 'runningvms': 0,
+                   'usedmemory': 0, 'usedcpus': 0, 'pools': {}, 'networks': {}}
+        for vm, stats in conn.getAllDomainStats(VIR_DOMAIN_STATS_STATE | VIR_DOMAIN_STATS_VCPU |
+                                                VIR_DOMAIN_STATS_BALLOON):
+            metrics['vms'] += 1
+            state = stats.get('state.state', VIR_DOMAIN_NOSTATE)
+            if state in [VIR_DOMAIN_NOSTATE, VIR_DOMAIN_SHUTOFF, VIR_DOMAIN_CRASHED]:
+                continue
+            metrics['runningvms'] += 1
+            metrics['usedmemory'] += int(stats.get('balloon.maximum', 0) / 1024)
+            metrics['usedcpus'] += stats.get('vcpu.current', 0)
+        details = self.metrics_details
+        now = time.time()
+        pools = conn.listAllStoragePools(VIR_CONNECT_LIST_STORAGE_POOLS_ACTIVE)
+        networks = conn.listAllNetworks()
+        # details are parsed from xml once, and parsed again when the object got redefined or after a while
+        for kind, objects in [('pools', pools), ('networks', networks)]:
+            current = {o.name(): o.UUIDString() for o in objects}
+            for name in list(details[kind]):
+                entry = details[kind][name]
+                if current.get(name) != entry['uuid'] or now - entry['timestamp'] > METRICSTTL:
+                    del details[kind][name]
+        for pool in pools:
             poolname = pool.name()
-            poolxml = pool.XMLDesc(0)
-            root = ET.fromstring(poolxml)
-            pooltype = list(root.iter('pool'))[0].get('type')
-            if pooltype in ['dir', 'zfs']:
-                poolpath = list(root.iter('path'))[0].text
-            else:
-                poolpath = list(root.iter('device'))[0].get('path')
+            if poolname not in details['pools']:
+                root = ET.fromstring(pool.XMLDesc(0))
+                pooltype = list(root.iter('pool'))[0].get('type')
+                if pooltype in ['dir', 'zfs']:
+                    poolpath = list(root.iter('path'))[0].text
+                else:
+                    poolpath = list(root.iter('device'))[0].get('path')
+                details['pools'][poolname] = {'uuid': pool.UUIDString(), 'timestamp': now,
+                                              'info': {'type': pooltype, 'path': poolpath}}
             s = pool.info()
-            used = "%.2f" % (float(s[2]) / 1024 / 1024 / 1024)
-            available = "%.2f" % (float(s[3]) / 1024 / 1024 / 1024)
-            # Type,Status, Total space in Gb, Available space in Gb
-            used = float(used)
-            available = float(available)
-            print(("Storage:%s Type: %s Path:%s Used space: %sGB Available space: %sGB" % (poolname, pooltype, poolpath,
-                                                                                           used, available)))
+            used = float("%.2f" % (float(s[2]) / 1024 / 1024 / 1024))
+            available = float("%.2f" % (float(s[3]) / 1024 / 1024 / 1024))
+            metrics['pools'][poolname] = dict(details['pools'][poolname]['info'], used=used, available=available)
         for interface in conn.listInterfaces():
             if interface == 'lo':
                 continue
-            print("Network: %s Type: bridged" % interface)
-        for network in conn.listAllNetworks():
+            metrics['networks'][interface] = {'type': 'bridged'}
+        for network in networks:
             networkname = network.name()
-            netxml = network.XMLDesc(0)
-            cidr = 'N/A'
-            root = ET.fromstring(netxml)
-            ip = list(root.iter('ip'))
-            if ip:
-                attributes = ip[0].attrib
-                firstip = attributes.get('address')
-                netmask = attributes.get('netmask')
-                if netmask is None:
-                    netmask = attributes.get('prefix')
-                try:
-                    ip = IPNetwork('%s/%s' % (firstip, netmask))
-                    cidr = ip.cidr
-                except:
-                    cidr = "N/A"
-            dhcp = list(root.iter('dhcp'))
-            if dhcp:
-                dhcp = True
+            if networkname not in details['networks']:
+                cidr = 'N/A'
+                root = ET.fromstring(network.XMLDesc(0))
+                ip = list(root.iter('ip'))
+                if ip:
+                    attributes = ip[0].attrib
+                    firstip = attributes.get('address')
+                    netmask = attributes.get('netmask')
+                    if netmask is None:
+                        netmask = attributes.get('prefix')
+                    try:
+                        ip = IPNetwork('%s/%s' % (firstip, netmask))
+                        cidr = str(ip.cidr)
+                    except:
+                        cidr = "N/A"
+                dhcp = True if list(root.iter('dhcp')) else False
+                details['networks'][networkname] = {'uuid': network.UUIDString(), 'timestamp': now,
+                                                    'info': {'type': 'routed', 'cidr': cidr, 'dhcp': dhcp}}
+            metrics['networks'][networkname] = details['networks'][networkname]['info']
+        return metrics
+
+    def report(self):
+        metrics = self.get_metrics()
+        print("Connection: %s" % metrics['connection'])
+        print("Host: %s" % metrics['host'])
+        print("Cpus: %s" % metrics['cpus'])
+        print("Vms Running: %s" % metrics['runningvms'])
+        print("Total Memory Assigned: %sMB of %sMB" % (metrics['usedmemory'], metrics['memory']))
+        for poolname, pool in metrics['pools'].items():
+            print(("Storage:%s Type: %s Path:%s Used space: %sGB Available space: %sGB" % (poolname, pool['type'],
+                                                                                           pool['path'], pool['used'],
+                                                                                           pool['available'])))
+        for networkname, network in metrics['networks'].items():
+            if network['type'] == 'bridged':
+                print("Network: %s Type: bridged" % networkname)
             else:
-                dhcp = False
-            print("Network: %s Type: routed Cidr: %s Dhcp: %s" % (networkname, cidr, dhcp))
+                print("Network: %s Type: routed Cidr: %s Dhcp: %s" % (networkname, network['cidr'], network['dhcp']))
 
     def status(self, name):
         conn = self.conn
@@ -1371,13 +1426,109 @@ class Kvirt(object):
             return None
         return status[vm.isActive()]
 
-    def list(self):
-        vms = []
+    def list(self, filters=None):
+        return sorted(self.iter_list(filters=filters), key=lambda x: x['name'])
+
+    def iter_list(self, filters=None):
         conn = self.conn
-        for vm in conn.listAllDomains(0):
-            vms.append(self.info(vm.name(), vm=vm))
+        filters = filters or {}
+        flags = 0
+        if filters.get('status') == 'up':
+            flags = VIR_CONNECT_GET_ALL_DOMAINS_STATS_RUNNING
+        elif filters.get('status') == 'down':
+            flags = VIR_CONNECT_GET_ALL_DOMAINS_STATS_SHUTOFF
+        metadatafilters = {key: filters[key] for key in ['plan', 'kube'] if filters.get(key) is not None}
+        metadatafilters.update(filters.get('labels', {}))
+        leases = None
+        for vm, stats in conn.getAllDomainStats(VIR_DOMAIN_STATS_STATE, flags):
+            state = stats.get('state.state', VIR_DOMAIN_NOSTATE)
+            if filters.get('name') is not None and not vm.name().startswith(filters['name']):
+                continue
+            if filters.get('status') is not None and states.get(state) != filters['status']:
+                continue
+            if metadatafilters:
+                metadata = self._get_metadata(vm)
+                if metadata is None or not common.vm_matches(metadata, {'labels': metadatafilters}):
+                    continue
+            if leases is None:
+                leases = self._get_leases()
+            yield self.info(vm.name(), vm=vm, state=state, leases=leases)
+
+    def watch_vms(self, timeout=5):
+        """Yield names of vms with a lifecycle event, or None when no event happened during timeout seconds"""
+        start_eventloop()
+        # the event loop needs to be registered before opening the connection
+        conn = libvirtopen(self.url)
+        events = Queue()
+        closed = Event()
+
+        def _lifecycle(conn, vm, event, detail, opaque):
+            events.put(vm.name())
+
+        def _close(conn, reason, opaque):
+            closed.set()
+        conn.setKeepAlive(5, 3)
+        conn.registerCloseCallback(_close, None)
+        callbackid = conn.domainEventRegisterAny(None, VIR_DOMAIN_EVENT_ID_LIFECYCLE, _lifecycle, None)
+        try:
+            while not closed.is_set():
+                try:
+                    yield events.get(timeout=timeout)
+                except Empty:
+                    yield None
+            error("Connection to %s closed" % self.url)
+        finally:
+            if not closed.is_set():
+                try:
+                    conn.domainEventDeregisterAny(callbackid)
+                    conn.unregisterCloseCallback()
+                    conn.close()
+                except libvirtError:
+                    pass
+
+    def list_plan_vms(self, plan):
+        vms = []
+        for vm in self.conn.listAllDomains(0):
+            vminfo = self._get_metadata(vm)
+            if vminfo is not None and vminfo.get('plan') == plan:
+                vms.append(vminfo)
         return sorted(vms, key=lambda x: x['name'])
 
+    def _get_metadata(self, vm):
+        try:
+            metadata = vm.metadata(VIR_DOMAIN_METADATA_ELEMENT, 'kvirt', 0)
+        except:
+            return None
+        vminfo = {'name': vm.name()}
+        for element in list(ET.fromstring(metadata)):
+            vminfo[element.tag.split('}')[-1]] = element.text
+        return vminfo
+
+    def _get_leases(self):
+        leases = {}
+        hosts = {}
+        for network in self.conn.listAllNetworks():
+            try:
+                if network.isActive():
+                    for lease in network.DHCPLeases():
+                        mac, ipaddr = lease.get('mac'), lease.get('ipaddr')
+                        if mac is None or ipaddr is None:
+                            continue
+                        if mac not in leases:
+                            leases[mac] = {'hwaddr': mac, 'addrs': []}
+                        leases[mac]['addrs'].append({'addr': ipaddr})
+                netroot = ET.fromstring(network.XMLDesc(0))
+            except:
+                continue
+            for host in list(netroot.iter('host')):
+                mac, hostip = host.get('mac'), host.get('ip')
+                if mac is not None and hostip is not None:
+                    hosts[mac] = {'hwaddr': mac, 'addrs': [{'addr': hostip}]}
+        for mac in hosts:
+            if mac not in leases:
+                leases[mac] = hosts[mac]
+        return leases
+
     def console(self, name, tunnel=False, web=False):
         conn = self.conn
         try:
@@ -1472,7 +1623,7 @@ class Kvirt(object):
                 error("No serial Console port found. Leaving...")
                 return
 
-    def info(self, name, vm=None, debug=False):
+    def info(self, name, vm=None, debug=False, state=None, leases=None):
         starts = {0: False, 1: True}
         conn = self.conn
         if vm is None:
@@ -1484,6 +1635,10 @@ class Kvirt(object):
                 return {}
         else:
             listinfo = True
+        if state is not None:
+            active = state not in [VIR_DOMAIN_NOSTATE, VIR_DOMAIN_SHUTOFF, VIR_DOMAIN_CRASHED]
+        else:
+            active = vm.isActive()
         xml = vm.XMLDesc(0)
         root = ET.fromstring(xml)
         uuid = vm.UUIDString()
@@ -1532,7 +1687,7 @@ class Kvirt(object):
         agentfaces = {}
         leasefaces = {}
         ifaces = {}
-        if vm.isActive():
+        if active:
             networktypes = [element.get('type') for element in list(root.iter('interface'))]
             if 'bridge' in networktypes:
                 try:
@@ -1540,10 +1695,14 @@ class Kvirt(object):
                 except:
                     pass
             if 'network' in networktypes:
-                try:
-                    leasefaces = vm.interfaceAddresses(vir_src_lease, 0)
-                except:
-                    pass
+                if leases is not None:
+                    macs = [element.find('mac').get('address') for element in list(root.iter('interface'))]
+                    leasefaces = {mac: leases[mac] for mac in macs if mac in leases}
+                else:
+                    try:
+                        leasefaces = vm.interfaceAddresses(vir_src_lease, 0)
+                    except:
+                        pass
             ifaces = {**agentfaces, **leasefaces}
         interfaces = list(root.iter('interface'))
         for index, element in enumerate(interfaces):
@@ -1556,7 +1715,7 @@ class Kvirt(object):
                 network = element.find('source').get('bridge')
             else:
                 network = element.find('source').get('network')
-            if vm.isActive() and ip is None and ifaces:
+            if active and ip is None and ifaces:
                 ips = []
                 for x in ifaces:
                     if ifaces[x]['hwaddr'] == mac and ifaces[x]['addrs'] is not None:
@@ -1577,7 +1736,8 @@ class Kvirt(object):
                 usernetinfo = {'device': 'eth%s' % len(yamlinfo['nets']), 'mac': 'N/A', 'net': 'user', 'type': 'user'}
                 yamlinfo['nets'].append(usernetinfo)
         if listinfo:
-            state = vm.state()[0]
+            if state is None:
+                state = vm.state()[0]
             yamlinfo['status'] = states.get(state)
             return yamlinfo
         [state, maxmem, memory, numcpus, cputime] = vm.info()
@@ -2190,12 +2350,12 @@ class Kvirt(object):
             return
         self._create_host_entry(name, ip, netname, domain)
 
-    def handler(self, stream, data, file_):
-        return file_.read(data)
-
-    def _uploadimage(self, name, pool='default', pooltype='file', origin='/tmp', suffix='.ISO', size=0):
+    def _uploadimage(self, name, pool='default', pooltype='file', origin='/tmp', suffix='.ISO', size=0, data=None):
         name = "%s%s" % (name, suffix)
         conn = self.conn
+        if data is None:
+            with open("%s/%s" % (origin, name), 'rb') as ori:
+                data = ori.read()
         poolxml = pool.XMLDesc(0)
         root = ET.fromstring(poolxml)
         for element in list(root.iter('path')):
@@ -2209,10 +2369,16 @@ class Kvirt(object):
             warning("Got %s when creating iso" % e)
         imagevolume = conn.storageVolLookupByPath(imagepath)
         stream = conn.newStream(0)
-        imagevolume.upload(stream, 0, 0)
-        with open("%s/%s" % (origin, name), 'rb') as ori:
-            stream.sendAll(self.handler, ori)
-            stream.finish()
+        imagevolume.upload(stream, 0, len(data), 0)
+        view = memoryview(data)
+        offset = 0
+        while offset < len(data):
+            sent = stream.send(view[offset:offset + UPLOADCHUNK].tobytes())
+            if sent < 0:
+                stream.abort()
+                raise libvirtError("Couldn't upload %s" % name)
+            offset += sent
+        stream.finish()
 
     def update_metadata(self, name, metatype, metavalue, append=False):
         ET.register_namespace('kvirt', 'kvirt')
@@ -2852,14 +3018,42 @@ class Kvirt(object):
         if shortimage_uncompressed in volumes:
             pprint("Image %s already there.Leaving..." % shortimage_uncompressed)
             return {'result': 'success'}
-        if name == 'rhcos42':
-            shortimage += '.gz'
+        target = "%s/%s" % (downloadpath, shortimage_uncompressed)
+        compression = 'gz' if name == 'rhcos42' else imagefetch.get_compression(shortimage)
+        fetchargs = ['-c', compression] if compression is not None else []
+        if self.imagecache:
+            fetchargs.extend(['--cache', '--cachesize', str(self.imagecachesize)])
+        fetchargs.extend([url, target])
+        cachedpath = None
+        if self.imagecache and self.host not in ['localhost', '127.0.0.1'] and\
+                os.path.isdir(os.path.expanduser(imagefetch.CACHEDIR)):
+            cache = imagefetch.ImageCache(size=self.imagecachesize)
+            cachedpath = cache.lookup(url, checksum=imagefetch.get_checksum(url))
         if self.host == 'localhost' or self.host == '127.0.0.1':
-            downloadcmd = "curl -Lo %s/%s -f '%s'" % (downloadpath, shortimage, url)
+            code = imagefetch.main(fetchargs)
+        elif self.protocol == 'ssh' and cachedpath is not None:
+            pprint("Seeding image from local cache")
+            remotecmd = "cat > %s.part && mv %s.part %s" % (target, target, target)
+            seedcmd = 'ssh %s -p %s %s@%s %s < %s' % (self.identitycommand, self.port, self.user, self.host,
+                                                      shlex.quote(remotecmd), cachedpath)
+            code = call(seedcmd, shell=True)
         elif self.protocol == 'ssh':
-            downloadcmd = 'ssh %s -p %s %s@%s "curl -Lo %s/%s -f \'%s\'"' % (self.identitycommand, self.port, self.user,
-                                                                             self.host, downloadpath, shortimage, url)
-        code = call(downloadcmd, shell=True)
+            # run the fetcher on the hypervisor so that the image only travels once
+            remotecmd = "python3 - %s" % ' '.join(shlex.quote(arg) for arg in fetchargs)
+            fetchcmd = 'ssh %s -p %s %s@%s %s < %s' % (self.identitycommand, self.port, self.user, self.host,
+                                                       shlex.quote(remotecmd), imagefetch.__file__)
+            code = call(fetchcmd, shell=True)
+            if code == 127:
+                warning("python3 not found on %s. Falling back to curl" % self.host)
+                if compression is not None:
+                    executable = {'xz': 'xz', 'gz': 'gzip', 'bz2': 'bzip2'}[compression]
+                    remotecmd = "curl -Lf %s | %s -dc > %s.part" % (shlex.quote(url), executable, target)
+                else:
+                    remotecmd = "curl -C - -Lfo %s.part %s" % (target, shlex.quote(url))
+                remotecmd += " && mv %s.part %s" % (target, target)
+                downloadcmd = 'ssh %s -p %s %s@%s %s' % (self.identitycommand, self.port, self.user, self.host,
+                                                         shlex.quote(remotecmd))
+                code = call(downloadcmd, shell=True)
         if code == 23:
             pprint("Consider running the following command on the hypervisor:")
             setfacluser = self.user
@@ -2872,21 +3066,6 @@ class Kvirt(object):
             return {'result': 'failure', 'reason': "of Permission issues"}
         elif code != 0:
             return {'result': 'failure', 'reason': "Unable to download indicated image"}
-        if shortimage.endswith('xz') or shortimage.endswith('gz') or shortimage.endswith('bz2') or name == 'rhcos42':
-            executable = {'xz': 'unxz', 'gz': 'gunzip', 'bz2': 'bunzip2'}
-            extension = os.path.splitext(shortimage)[1].replace('.', '')
-            executable = executable[extension] if name != 'rhcos42' else 'gunzip'
-            if self.host == 'localhost' or self.host == '127.0.0.1':
-                if find_executable(executable) is not None:
-                    uncompresscmd = "%s %s/%s" % (executable, poolpath, shortimage)
-                    os.system(uncompresscmd)
-                else:
-                    error("%s not found. Can't uncompress image" % executable)
-                    return {'result': 'failure', 'reason': "%snot found. Can't uncompress image" % executable}
-            elif self.protocol == 'ssh':
-                uncompresscmd = 'ssh %s -p %s %s@%s "%s %s/%s"' % (self.identitycommand, self.port, self.user,
-                                                                   self.host, executable, poolpath, shortimage)
-                os.system(uncompresscmd)
         if cmd is not None:
             if self.host == 'localhost' or self.host == '127.0.0.1':
                 if find_executable('virt-customize') is not None:
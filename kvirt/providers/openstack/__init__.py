@@ -17,6 +17,7 @@ from novaclient import client as novaclient
 from neutronclient.v2_0.client import Client as neutronclient
 import swiftclient.client as swiftclient
 import os
+import re
 from time import sleep
 import webbrowser
 from ipaddress import ip_address, ip_network
@@ -287,12 +288,27 @@ class Kopenstack(object):
         return
 
 # should return a sorted list of name, state, ip, source, plan, profile, report
-    def list(self):
+    def list(self, filters=None):
         vms = []
         nova = self.nova
-        vmslist = nova.servers.list()
+        filters = filters or {}
+        search_opts = {}
+        if filters.get('name') is not None:
+            search_opts['name'] = '^%s' % re.escape(filters['name'])
+        if filters.get('status') is not None:
+            filters = filters.copy()
+            filters['status'] = {'up': 'ACTIVE', 'down': 'SHUTOFF'}.get(filters['status'], filters['status'])
+            search_opts['status'] = filters['status']
+        vmslist = nova.servers.list(search_opts=search_opts)
+        if not vmslist:
+            return vms
+        images = {image.id: image.name for image in self.glance.images.list()}
+        flavors = {flavor.id: flavor for flavor in nova.flavors.list(is_public=None)}
+        volumes = {volume.id: volume for volume in self.cinder.volumes.list()}
         for vm in vmslist:
-            vms.append(self.info(vm.name, vm=vm))
+            vminfo = self.info(vm.name, vm=vm, images=images, flavors=flavors, volumes=volumes)
+            if common.vm_matches(vminfo, filters):
+                vms.append(vminfo)
         return sorted(vms, key=lambda x: x['name'])
 
     def console(self, name, tunnel=False, web=False):
@@ -341,7 +357,7 @@ class Kopenstack(object):
                 domain = metadata['domain']
         return dnsclient, domain
 
-    def info(self, name, vm=None, debug=False):
+    def info(self, name, vm=None, debug=False, images=None, flavors=None, volumes=None):
         nova = self.nova
         cinder = self.cinder
         if vm is None:
@@ -360,16 +376,27 @@ class Kopenstack(object):
         source = ''
         if 'id' in vm.image:
             source = vm.image['id']
-            try:
-                source = self.glance.images.get(vm.image['id']).name
-            except:
-                pass
+            if images is not None and source in images:
+                source = images[source]
+            else:
+                try:
+                    source = self.glance.images.get(vm.image['id']).name
+                except:
+                    pass
         yamlinfo['image'] = source
         yamlinfo['user'] = common.get_user(source)
-        flavor = nova.flavors.get(vm.flavor['id'])
-        yamlinfo['flavor'] = flavor.name
-        yamlinfo['memory'] = flavor.ram
-        yamlinfo['cpus'] = flavor.vcpus
+        if 'id' not in vm.flavor:
+            yamlinfo['flavor'] = vm.flavor.get('original_name')
+            yamlinfo['memory'] = vm.flavor.get('ram')
+            yamlinfo['cpus'] = vm.flavor.get('vcpus')
+        else:
+            if flavors is not None and vm.flavor['id'] in flavors:
+                flavor = flavors[vm.flavor['id']]
+            else:
+                flavor = nova.flavors.get(vm.flavor['id'])
+            yamlinfo['flavor'] = flavor.name
+            yamlinfo['memory'] = flavor.ram
+            yamlinfo['cpus'] = flavor.vcpus
         yamlinfo['nets'] = []
         index = 0
         for key in list(vm.addresses):
@@ -389,7 +416,10 @@ class Kopenstack(object):
         disks = []
         for disk in vm._info['os-extended-volumes:volumes_attached']:
             diskid = disk['id']
-            volume = cinder.volumes.get(diskid)
+            if volumes is not None and diskid in volumes:
+                volume = volumes[diskid]
+            else:
+                volume = cinder.volumes.get(diskid)
             disksize = volume.size
             devname = volume.name
             disks.append({'device': devname, 'size': disksize, 'format': '', 'type': '', 'path': diskid})
@@ -407,24 +407,53 @@ class KOvirt(object):
         print("not implemented")
         return
 
-    def list(self):
+    def list(self, filters=None):
         vms = []
         system_service = self.conn.system_service()
+        filters = filters or {}
+        search = None
         if self.filtertag is not None:
-            vmslist = self.vms_service.list(search='description=plan*,filter=%s*' % self.filtertag)
+            search = 'description=plan*,filter=%s*' % self.filtertag
         elif self.filteruser:
             users_service = system_service.users_service()
             user_name = '%s-authz' % self.user if '@internal' in self.user else self.user
             userid = [u.id for u in users_service.list() if u.user_name == user_name][0]
-            vmslist = self.vms_service.list(search='created_by_user_id=%s' % userid)
+            search = 'created_by_user_id=%s' % userid
         elif self.filtervms:
-            vmslist = self.vms_service.list(search='description=plan=*,profile=*')
-        else:
-            vmslist = self.vms_service.list()
+            search = 'description=plan=*,profile=*'
+        searches = [search] if search is not None else []
+        if filters.get('name') is not None:
+            searches.append('name=%s*' % filters['name'])
+        if filters.get('status') is not None:
+            searches.append('status=%s' % filters['status'])
+        # metadata lives in the description, so search narrows the results which get matched exactly afterwards
+        metadata = {key: filters[key] for key in ['plan', 'kube'] if filters.get(key) is not None}
+        metadata.update(filters.get('labels', {}))
+        for key in metadata:
+            searches.append('description=*%s=%s*' % (key, metadata[key]))
+        search = ' and '.join(searches) if searches else None
+        try:
+            vmslist = self.vms_service.list(search=search, follow='template,host,reported_devices')
+            followed = True
+        except TypeError:
+            vmslist = self.vms_service.list(search=search)
+            followed = False
+        templates, hosts = {}, {}
         for vm in vmslist:
-            vms.append(self.info(vm.name, vm=vm))
+            vminfo = self.info(vm.name, vm=vm, followed=followed, templates=templates, hosts=hosts)
+            if common.vm_matches(vminfo, filters):
+                vms.append(vminfo)
         return sorted(vms, key=lambda x: x['name'])
 
+    def _follow(self, link, cache=None):
+        if link.name is not None:
+            return link
+        if cache is None:
+            return self.conn.follow_link(link)
+        if link.id not in cache:
+            cache[link.id] = self.conn.follow_link(link)
+        return cache[link.id]
+
     def console(self, name, tunnel=False, web=False):
         connectiondetails = None
         vmsearch = self.vms_service.list(search='name=%s' % name)
@@ -564,8 +593,7 @@ release-cursor=shift+f12""".format(address=address, port=port, ticket=ticket.val
                     domain = desc[1]
         return dnsclient, domain
 
-    def info(self, name, vm=None, debug=False):
-        conn = self.conn
+    def info(self, name, vm=None, debug=False, followed=False, templates=None, hosts=None):
         minimal = False
         if vm is None:
             vmsearch = self.vms_service.list(search='name=%s' % name)
@@ -577,7 +605,7 @@ release-cursor=shift+f12""".format(address=address, port=port, ticket=ticket.val
             minimal = True
         status = str(vm.status)
         yamlinfo = {'name': vm.name, 'disks': [], 'nets': [], 'status': status, 'instanceid': vm.id}
-        template = conn.follow_link(vm.template)
+        template = self._follow(vm.template, templates)
         source = template.name
         yamlinfo['image'] = source
         yamlinfo['user'] = common.get_user(source)
@@ -590,7 +618,7 @@ release-cursor=shift+f12""".format(address=address, port=port, ticket=ticket.val
                     yamlinfo[desc[0]] = desc[1]
         try:
             if status == 'up':
-                host = conn.follow_link(vm.host)
+                host = self._follow(vm.host, hosts)
                 yamlinfo['host'] = host.name
         except:
             pass
@@ -598,19 +626,20 @@ release-cursor=shift+f12""".format(address=address, port=port, ticket=ticket.val
         cpus = vm.cpu.topology.cores * vm.cpu.topology.sockets
         yamlinfo['cpus'] = cpus
         yamlinfo['creationdate'] = vm._creation_time.strftime("%d-%m-%Y %H:%M")
-        devices = self.vms_service.vm_service(vm.id).reported_devices_service().list()
+        vm_service = self.vms_service.vm_service(vm.id)
+        devices = (vm.reported_devices or []) if followed else vm_service.reported_devices_service().list()
         ips = []
         for device in devices:
             if device.ips:
                 for ip in device.ips:
                     if str(ip.version) == 'v4' and ip.address not in ['172.17.0.1', '127.0.0.1']:
                         ips.append(ip.address)
-        nics = self.vms_service.vm_service(vm.id).nics_service().list()
-        profiles_service = self.conn.system_service().vnic_profiles_service()
         if ips:
             yamlinfo['ip'] = ips[-1]
         if minimal:
             return yamlinfo
+        nics = vm_service.nics_service().list()
+        profiles_service = self.conn.system_service().vnic_profiles_service()
         if not self.netprofiles:
             self.netprofiles = {}
             for profile in profiles_service.list():
@@ -621,10 +650,11 @@ release-cursor=shift+f12""".format(address=address, port=port, ticket=ticket.val
             network = self.netprofiles[nic.vnic_profile.id] if nic.vnic_profile is not None else 'N/A'
             network_type = str(nic.interface)
             yamlinfo['nets'].append({'device': device, 'mac': mac, 'net': network, 'type': network_type})
-        attachments = self.vms_service.vm_service(vm.id).disk_attachments_service().list()
+        attachments = vm_service.disk_attachments_service().list()
+        storagedomains = {}
         for attachment in attachments:
-            disk = conn.follow_link(attachment.disk)
-            storagedomain = conn.follow_link(disk.storage_domains[0]).name if disk.storage_domains else ''
+            disk = self._follow(attachment.disk)
+            storagedomain = self._follow(disk.storage_domains[0], storagedomains).name if disk.storage_domains else ''
             device = disk.name
             disksize = int(disk.provisioned_size / 2**30)
             diskformat = str(disk.format)
@@ -397,14 +397,22 @@ class Kpacket(object):
             return None
 
 # should return a sorted list of name, state, ip, source, plan, profile, report
-    def list(self):
+    def list(self, filters=None):
         """
 
+        :param filters:
         :return:
         """
         vms = []
+        vlans = None
         for vm in self.conn.list_devices(self.project):
-            vms.append(self.info(vm.hostname, vm=vm))
+            if filters is not None and not vm.hostname.startswith(filters.get('name') or ''):
+                continue
+            if vlans is None:
+                vlans = self.conn.list_vlans(self.project)
+            vminfo = self.info(vm.hostname, vm=vm, ignore_volumes=True, vlans=vlans)
+            if common.vm_matches(vminfo, filters):
+                vms.append(vminfo)
         return sorted(vms, key=lambda x: x['name'])
 
     def console(self, name, tunnel=False, web=False):
@@ -447,21 +455,28 @@ class Kpacket(object):
         os.system(sshcommand)
         return
 
-    def info(self, name, output='plain', fields=[], values=False, vm=None, debug=False):
+    def info(self, name, output='plain', fields=[], values=False, vm=None, debug=False, ignore_volumes=False,
+             vlans=None):
         """
 
         :param name:
         :param output:
         :param fields:
         :param values:
+        :param vm:
+        :param ignore_volumes:
+        :param vlans:
         :return:
         """
-        devices = [d for d in self.conn.list_devices(self.project) if d.hostname == name]
-        if devices:
-            device = devices[0]
+        if vm is not None:
+            device = vm
         else:
-            error("VM %s not found" % name)
-            return {}
+            devices = [d for d in self.conn.list_devices(self.project) if d.hostname == name]
+            if devices:
+                device = devices[0]
+            else:
+                error("VM %s not found" % name)
+                return {}
         if debug:
             print(vars(device))
         name = device.hostname
@@ -488,11 +503,10 @@ class Kpacket(object):
                 if not bonded:
                     virtual_networks = entry['virtual_networks']
                     virtual_network_ids = [os.path.basename(vn['href']) for vn in virtual_networks]
-                    vlans = []
-                    for vlan in self.conn.list_vlans(self.project):
-                        if vlan.id in virtual_network_ids:
-                            vlans.append(vlan.description if vlan.description is not None else vlan.vxlan)
-                    network = ','.join(vlans)
+                    if vlans is None:
+                        vlans = self.conn.list_vlans(self.project)
+                    network = ','.join([vlan.description if vlan.description is not None else str(vlan.vxlan)
+                                        for vlan in vlans if vlan.id in virtual_network_ids])
                 mac = entry['data']['mac']
                 nets.append({'device': dev, 'mac': mac, 'net': network, 'type': networktype})
         kernel = None
@@ -513,7 +527,7 @@ class Kpacket(object):
                 path = ''
                 disks.append({'device': dev, 'size': disksize, 'format': diskformat, 'type': drivertype,
                               'path': path})
-        for volume in device.volumes:
+        for volume in [] if ignore_volumes else device.volumes:
             volumeid = os.path.basename(volume['href'])
             volumeinfo = self.conn.get_volume(volumeid)
             dev = volumeinfo.name
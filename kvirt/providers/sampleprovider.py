@@ -180,9 +180,11 @@ class Kbase(object):
         return
 
 # should return a sorted list of name, state, ip, source, plan, profile, report
-    def list(self):
+# filters is an optional dict with plan, kube, status, name (prefix) and labels keys to evaluate natively when possible
+    def list(self, filters=None):
         """
 
+        :param filters:
         :return:
         """
         print("not implemented")
@@ -75,6 +75,27 @@ def collectproperties(si, view, objtype, pathset=None, includemors=False):
     return data
 
 
+def vminfo(properties, host=None):
+    """Build the listing fields of a vm out of its properties, keyed by property path"""
+    translation = {'poweredOff': 'down', 'poweredOn': 'up', 'suspended': 'suspended'}
+    powerstate = properties['runtime.powerState']
+    yamlinfo = {'name': properties['name'], 'id': properties.get('config.instanceUuid'),
+                'cpus': properties.get('config.hardware.numCPU'), 'memory': properties.get('config.hardware.memoryMB'),
+                'status': translation[powerstate], 'nets': [], 'disks': []}
+    if powerstate == "poweredOn":
+        if host is not None:
+            yamlinfo['host'] = host
+        for nic in properties.get('guest.net', []):
+            if 'ip' not in yamlinfo and nic.ipAddress:
+                yamlinfo['ip'] = nic.ipAddress[0]
+    for entry in properties.get('config.extraConfig', []):
+        if entry.key in METADATA_FIELDS:
+            yamlinfo[entry.key] = entry.value
+        if entry.key == 'image':
+            yamlinfo['user'] = common.get_user(entry.value)
+    return yamlinfo
+
+
 def find(si, folder, vimtype, name):
     o = si.content.viewManager.CreateContainerView(folder, [vimtype], True)
     view = o.view
@@ -828,8 +849,6 @@ class Ksphere:
                 webbrowser.open(vmurl, new=2, autoraise=True)
 
     def info(self, name, output='plain', fields=[], values=False, vm=None, debug=False):
-        translation = {'poweredOff': 'down', 'poweredOn': 'up', 'suspended': 'suspended'}
-        yamlinfo = {}
         si = self.si
         dc = self.dc
         vmFolder = dc.vmFolder
@@ -841,24 +860,13 @@ class Ksphere:
                 return {}
         else:
             listinfo = True
-        summary = vm.summary
-        yamlinfo['name'] = name
-        yamlinfo['id'] = summary.config.instanceUuid
-        yamlinfo['cpus'] = vm.config.hardware.numCPU
-        yamlinfo['memory'] = vm.config.hardware.memoryMB
-        yamlinfo['status'] = translation[vm.runtime.powerState]
-        yamlinfo['nets'] = []
-        yamlinfo['disks'] = []
-        if vm.runtime.powerState == "poweredOn":
-            yamlinfo['host'] = vm.runtime.host.name
-            for nic in vm.guest.net:
-                if 'ip' not in yamlinfo and nic.ipAddress:
-                    yamlinfo['ip'] = nic.ipAddress[0]
-        for entry in vm.config.extraConfig:
-            if entry.key in METADATA_FIELDS:
-                yamlinfo[entry.key] = entry.value
-            if entry.key == 'image':
-                yamlinfo['user'] = common.get_user(entry.value)
+        properties = {'name': name, 'config.instanceUuid': vm.summary.config.instanceUuid,
+                      'config.hardware.numCPU': vm.config.hardware.numCPU,
+                      'config.hardware.memoryMB': vm.config.hardware.memoryMB,
+                      'config.extraConfig': vm.config.extraConfig, 'runtime.powerState': vm.runtime.powerState,
+                      'guest.net': vm.guest.net}
+        host = vm.runtime.host.name if vm.runtime.powerState == "poweredOn" else None
+        yamlinfo = vminfo(properties, host=host)
         if listinfo:
             return yamlinfo
         if debug:
@@ -891,18 +899,39 @@ class Ksphere:
                 yamlinfo['disks'].append(disk)
         return yamlinfo
 
-    def list(self):
+    def list(self, filters=None):
+        translation = {'poweredOff': 'down', 'poweredOn': 'up', 'suspended': 'suspended'}
+        filters = filters or {}
         rootFolder = self.rootFolder
         si = self.si
         vms = []
+        view = si.content.viewManager.CreateContainerView(rootFolder, [vim.HostSystem], True)
+        try:
+            hostlist = collectproperties(si, view=view, objtype=vim.HostSystem, pathset=['name'], includemors=True)
+        finally:
+            view.Destroy()
+        hosts = {h['obj']._moId: h['name'] for h in hostlist}
+        pathset = ['name', 'config.instanceUuid', 'config.template', 'config.hardware.numCPU',
+                   'config.hardware.memoryMB', 'config.extraConfig', 'runtime.powerState', 'runtime.host',
+                   'runtime.connectionState', 'guest.net']
         view = si.content.viewManager.CreateContainerView(rootFolder, [vim.VirtualMachine], True)
-        vmlist = collectproperties(si, view=view, objtype=vim.VirtualMachine, pathset=['name'], includemors=True)
+        try:
+            vmlist = collectproperties(si, view=view, objtype=vim.VirtualMachine, pathset=pathset)
+        finally:
+            view.Destroy()
         for o in vmlist:
-            vm = o['obj']
-            if vm.summary.runtime.connectionState != 'orphaned' and not vm.config.template:
-                if self.filtervms and 'plan' not in [x.key for x in vm.config.extraConfig]:
-                    continue
-                vms.append(self.info(o['name'], vm=vm))
+            if o.get('runtime.connectionState') == 'orphaned' or o.get('config.template', True):
+                continue
+            if self.filtervms and 'plan' not in [x.key for x in o.get('config.extraConfig', [])]:
+                continue
+            if filters.get('name') is not None and not o['name'].startswith(filters['name']):
+                continue
+            if filters.get('status') is not None and translation[o['runtime.powerState']] != filters['status']:
+                continue
+            host = hosts.get(o['runtime.host']._moId) if o.get('runtime.host') is not None else None
+            yamlinfo = vminfo(o, host=host)
+            if common.vm_matches(yamlinfo, filters):
+                vms.append(yamlinfo)
         return sorted(vms, key=lambda x: x['name'])
 
     def list_pools(self):
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+capacity aware placement of vms across the members of a group
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+from threading import Lock
+from time import time
+
+SAMPLETTL = 30
+CPUOVERCOMMIT = 4
+WEIGHTS = {'memory': 0.5, 'cpus': 0.3, 'disk': 0.2}
+
+samples = {}
+samples_lock = Lock()
+inventories = {}
+
+
+def disks_size(disks, disksize=10):
+    """
+
+    :param disks:
+    :param disksize:
+    :return:
+    """
+    size = 0
+    for disk in disks:
+        if isinstance(disk, int) or (isinstance(disk, str) and disk.isdigit()):
+            size += int(disk)
+        elif isinstance(disk, dict):
+            size += int(disk.get('size', disksize))
+        else:
+            size += disksize
+    return size
+
+
+def get_capacity(client, k, ttl=SAMPLETTL):
+    """
+
+    :param client:
+    :param k:
+    :param ttl:
+    :return:
+    """
+    with samples_lock:
+        if client in samples and time() - samples[client]['timestamp'] < ttl:
+            return samples[client]['capacity']
+    capacity = k.get_capacity() if hasattr(k, 'get_capacity') else None
+    with samples_lock:
+        samples[client] = {'timestamp': time(), 'capacity': capacity}
+    return capacity
+
+
+def score(capacity, memory=0, numcpus=0, pool=None, disksize=0):
+    """
+
+    :param capacity:
+    :param memory:
+    :param numcpus:
+    :param pool:
+    :param disksize:
+    :return:
+    """
+    if capacity is None:
+        return 0
+    freememory = capacity['freememory'] - memory
+    freecpus = capacity['cpus'] * CPUOVERCOMMIT - capacity['usedcpus'] - numcpus
+    if freememory < 0 or freecpus < 0:
+        return None
+    memoryscore = freememory / capacity['memory']
+    cpuscore = freecpus / (capacity['cpus'] * CPUOVERCOMMIT)
+    diskscore = 1
+    if pool is not None and pool in capacity['pools']:
+        poolinfo = capacity['pools'][pool]
+        freedisk = poolinfo['free'] - disksize
+        if freedisk < 0:
+            return None
+        diskscore = freedisk / poolinfo['total'] if poolinfo['total'] else 0
+    return WEIGHTS['memory'] * memoryscore + WEIGHTS['cpus'] * cpuscore + WEIGHTS['disk'] * diskscore
+
+
+def get_inventory(client, k, kind, ttl=SAMPLETTL):
+    """
+
+    :param client:
+    :param k:
+    :param kind:
+    :param ttl:
+    :return:
+    """
+    with samples_lock:
+        entry = inventories.get((client, kind))
+        if entry is not None and time() - entry['timestamp'] < ttl:
+            return entry['names']
+    if kind == 'images':
+        names = set(os.path.basename(v) for v in k.volumes())
+    else:
+        names = set(k.list_networks())
+    with samples_lock:
+        inventories[(client, kind)] = {'timestamp': time(), 'names': names}
+    return names
+
+
+def has_requirements(client, k, image=None, nets=[], ttl=SAMPLETTL):
+    """
+
+    :param client:
+    :param k:
+    :param image:
+    :param nets:
+    :param ttl:
+    :return:
+    """
+    if image is not None and os.path.basename(image) not in get_inventory(client, k, 'images', ttl=ttl):
+        return False
+    if nets:
+        networks = get_inventory(client, k, 'networks', ttl=ttl)
+        if [net for net in nets if net not in networks]:
+            return False
+    return True
+
+
+def select_client(clients, memory=0, numcpus=0, pool=None, disksize=0, image=None, nets=[]):
+    """Return the client with the best score for a vm of the given size, reserving its resources"""
+    with ThreadPoolExecutor(max_workers=max(len(clients), 1)) as executor:
+        futures = {client: executor.submit(get_capacity, client, clients[client]) for client in clients}
+        checks = {client: executor.submit(has_requirements, client, clients[client], image, nets)
+                  for client in clients}
+        capacities = {client: futures[client].result() for client in clients}
+        eligible = [client for client in clients if checks[client].result()]
+    bestclient, bestscore = None, None
+    # scoring and reservation happen atomically so that concurrent placements don't pick the same free resources
+    with samples_lock:
+        for client in eligible:
+            capacity = samples[client]['capacity'] if client in samples else capacities[client]
+            if capacity is not None and pool is not None and capacity['pools'] and pool not in capacity['pools']:
+                continue
+            clientscore = score(capacity, memory=memory, numcpus=numcpus, pool=pool, disksize=disksize)
+            if clientscore is not None and (bestscore is None or clientscore > bestscore):
+                bestclient, bestscore = client, clientscore
+        capacity = samples[bestclient]['capacity'] if bestclient in samples else None
+        if capacity is not None:
+            capacity['freememory'] -= memory
+            capacity['usedcpus'] += numcpus
+            if pool is not None and pool in capacity['pools']:
+                capacity['pools'][pool]['free'] -= disksize
+    return bestclient
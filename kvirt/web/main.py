@@ -4,10 +4,11 @@
 from distutils.spawn import find_executable
 from flask import Flask, render_template, request, jsonify, redirect, Response
 from kvirt.config import Kconfig
-from kvirt.common import print_info, get_free_port
+from kvirt.common import print_info, get_free_port, get_cache, set_cache, update_cache
 from kvirt.baseconfig import Kbaseconfig
 from kvirt.containerconfig import Kcontainerconfig
 from kvirt.defaults import IMAGES, WEBSOCKIFYCERT
+from kvirt import metrics
 from kvirt import nameutils
 import os
 from time import sleep
@@ -32,10 +33,15 @@ def vmstable():
     """
     retrieves all vms in table
     """
-    config = Kconfig()
-    k = config.k
+    baseconfig = Kbaseconfig()
+    _list = get_cache(baseconfig.client, ttl=baseconfig.cachettl) if baseconfig.cache else None
+    if _list is None:
+        config = Kconfig()
+        _list = config.k.list()
+        if config.cache:
+            set_cache(config.client, _list)
     vms = []
-    for vm in k.list():
+    for vm in _list:
         vm['info'] = print_info(vm, output='plain', pretty=True)
         vms.append(vm)
     return render_template('vmstable.html', vms=vms)
@@ -325,10 +331,16 @@ def vmaction():
         else:
             if action == 'start':
                 result = k.start(name)
+                if result['result'] == 'success':
+                    update_cache(config.client, name, status='up')
             elif action == 'stop':
                 result = k.stop(name)
+                if result['result'] == 'success':
+                    update_cache(config.client, name, status='down')
             elif action == 'delete':
                 result = k.delete(name)
+                if result['result'] == 'success':
+                    update_cache(config.client, name, delete=True)
             elif action == 'create' and 'profile' in request.form:
                 profile = request.form['profile']
                 parameters = {}
@@ -949,6 +961,41 @@ def vmconsole(name):
         return Response(status=404)
 
 
+metricsclients = {}
+
+
+def metricsclient(client):
+    """
+    returns a provider connection for client, kept across scrapes
+    """
+    k = metricsclients.get(client)
+    conn = getattr(k, 'conn', None)
+    if k is not None and hasattr(conn, 'isAlive'):
+        try:
+            alive = conn.isAlive() == 1
+        except:
+            alive = False
+        if not alive:
+            k = None
+    if k is None:
+        k = Kconfig(client=client).k
+        metricsclients[client] = k
+    return k
+
+
+@app.route('/metrics')
+def hostmetrics():
+    """
+    exposes capacity metrics of clients in prometheus format
+    """
+    baseconfig = Kbaseconfig()
+    clients = request.args.get('client', baseconfig.client).split(',')
+    allmetrics = {}
+    for client in clients:
+        allmetrics[client] = metrics.get_metrics(client, lambda: metricsclient(client))
+    return Response(metrics.prometheus(allmetrics), mimetype='text/plain; version=0.0.4')
+
+
 def run():
     """
 
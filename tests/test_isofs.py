@@ -0,0 +1,111 @@
+# coding=utf-8
+import shutil
+import struct
+import subprocess
+import pytest
+from kvirt.isofs import SECTOR, make_iso
+
+
+def read_tree(data, descriptor):
+    """
+
+    :param data:
+    :param descriptor:
+    :return:
+    """
+    joliet = data[descriptor] == 2
+    encoding = 'utf-16-be' if joliet else 'ascii'
+    files = {}
+    pending = [('', data[descriptor + 156:descriptor + 190])]
+    while pending:
+        path, record = pending.pop(0)
+        extent = struct.unpack('<I', record[2:6])[0] * SECTOR
+        size = struct.unpack('<I', record[10:14])[0]
+        position = extent
+        while position < extent + size:
+            length = data[position]
+            if length == 0:
+                position = (position // SECTOR + 1) * SECTOR
+                continue
+            entry = data[position:position + length]
+            position += length
+            identifier = entry[33:33 + entry[32]]
+            if identifier in [b'\x00', b'\x01']:
+                continue
+            name = "%s/%s" % (path, identifier.decode(encoding).split(';')[0])
+            if entry[25] & 2:
+                pending.append((name, entry))
+            else:
+                fileextent = struct.unpack('<I', entry[2:6])[0] * SECTOR
+                files[name] = data[fileextent:fileextent + struct.unpack('<I', entry[10:14])[0]]
+    return files
+
+
+def read_pathtable(data, descriptor):
+    """
+
+    :param data:
+    :param descriptor:
+    :return:
+    """
+    size = struct.unpack('<I', data[descriptor + 132:descriptor + 136])[0]
+    position = struct.unpack('<I', data[descriptor + 140:descriptor + 144])[0] * SECTOR
+    encoding = 'utf-16-be' if data[descriptor] == 2 else 'ascii'
+    names = []
+    end = position + size
+    while position < end:
+        length = data[position]
+        identifier = data[position + 8:position + 8 + length]
+        names.append(identifier.decode(encoding) if identifier != b'\x00' else '')
+        position += 8 + length + length % 2
+    return names
+
+
+class TestIsoFs:
+    @classmethod
+    def setup_class(self):
+        """
+
+        """
+        self.files = {'user-data': '#cloud-config\nhostname: test\n', 'meta-data': 'instance-id: test\n',
+                      'openstack/latest/meta_data.json': '{"uuid": "test"}', 'big.bin': b'\x01' * (3 * SECTOR + 5)}
+        self.data = make_iso(self.files, volid='cidata')
+
+    def test_size(self):
+        assert len(self.data) % SECTOR == 0
+
+    def test_descriptors(self):
+        data = self.data
+        assert data[16 * SECTOR:16 * SECTOR + 6] == b'\x01CD001'
+        assert data[17 * SECTOR:17 * SECTOR + 6] == b'\x02CD001'
+        assert data[18 * SECTOR:18 * SECTOR + 6] == b'\xffCD001'
+        assert data[16 * SECTOR + 40:16 * SECTOR + 46] == b'cidata'
+        assert data[17 * SECTOR + 40:17 * SECTOR + 52].decode('utf-16-be') == 'cidata'
+
+    def test_joliet_tree(self):
+        files = read_tree(self.data, 17 * SECTOR)
+        expected = {"/%s" % path: content.encode() if isinstance(content, str) else content
+                    for path, content in self.files.items()}
+        assert files == expected
+
+    def test_primary_tree(self):
+        files = read_tree(self.data, 16 * SECTOR)
+        assert sorted(files) == ['/BIG.BIN', '/META_DAT.', '/OPENSTAC/LATEST/META_DAT.JSO', '/USER_DAT.']
+        assert files['/USER_DAT.'] == self.files['user-data'].encode()
+
+    def test_pathtable(self):
+        assert read_pathtable(self.data, 16 * SECTOR) == ['', 'OPENSTAC', 'LATEST']
+        assert read_pathtable(self.data, 17 * SECTOR) == ['', 'openstack', 'latest']
+
+    @pytest.mark.skipif(shutil.which('bsdtar') is None, reason='bsdtar not available')
+    def test_bsdtar(self, tmp_path):
+        isofile = tmp_path / 'test.iso'
+        isofile.write_bytes(self.data)
+        listing = subprocess.check_output(['bsdtar', '-tf', str(isofile)]).decode().split()
+        assert 'openstack/latest/meta_data.json' in listing
+        content = subprocess.check_output(['bsdtar', '-xOf', str(isofile), 'user-data'])
+        assert content == self.files['user-data'].encode()
+
+    def test_long_name(self):
+        with pytest.raises(ValueError):
+            make_iso({'%s.txt' % ('x' * 64): 'data'})